@@ -44,9 +44,8 @@ ERP_BODY = {
 
 async def _read_bearer(db: AsyncSession) -> str:
     """Citește bearer token ERP Prod (10.170.4.101) din DB."""
-    result = await db.execute(select(Setting).where(Setting.cheie == "erp_prod_bearer_token"))
-    s = result.scalar_one_or_none()
-    return (s.valoare or "") if s else ""
+    valoare = await db.scalar(select(Setting.valoare).where(Setting.cheie == "erp_prod_bearer_token"))
+    return valoare or ""
 
 
 def _vendor_field(vendor: dict, *keys: str) -> str:
@@ -247,15 +247,24 @@ async def get_apeluri_istoric_detalii(
     """Get a specific day's summary + individual call details."""
     async with AsyncSessionLocal() as session:
         result = await session.execute(
-            select(ApeluriZilnic)
-            .options(selectinload(ApeluriZilnic.detalii))
-            .where(ApeluriZilnic.id == id)
+            select(ApeluriZilnic).where(ApeluriZilnic.id == id)
         )
         zilnic = result.scalar_one_or_none()
 
         if not zilnic:
             raise HTTPException(status_code=404, detail="Record not found")
 
+        # Detaliile ca rânduri Core, sortate în SQL (fără obiecte ORM per apel)
+        detalii = (await session.execute(
+            select(
+                ApeluriDetalii.id, ApeluriDetalii.callid, ApeluriDetalii.caller_id,
+                ApeluriDetalii.agent, ApeluriDetalii.status, ApeluriDetalii.ora,
+                ApeluriDetalii.hold_time, ApeluriDetalii.call_time,
+            )
+            .where(ApeluriDetalii.apeluri_zilnic_id == id)
+            .order_by(sa_func.coalesce(ApeluriDetalii.ora, "").desc())
+        )).all()
+
         return {
             "id": zilnic.id,
             "data": zilnic.data.isoformat(),
@@ -287,7 +296,7 @@ async def get_apeluri_istoric_detalii(
                     "hold_time": d.hold_time,
                     "call_time": d.call_time,
                 }
-                for d in sorted(zilnic.detalii, key=lambda x: x.ora or "", reverse=True)
+                for d in detalii
             ],
         }
 
@@ -1,5 +1,6 @@
 """Trend analysis for historical call data from Asterisk CDR Master.csv"""
 
+import asyncio
 import csv
 import statistics
 from collections import defaultdict
@@ -335,5 +336,7 @@ async def get_apeluri_trend(
     current_user=Depends(get_current_user),
 ):
     """Historical call trend analysis from CDR Master.csv."""
-    rows = parse_master_csv(MASTER_CSV, days=days)
-    return compute_trend_stats(rows)
+    # Citirea + parsarea CSV-ului (pe mount-ul Asterisk) rulează într-un thread,
+    # ca să nu blocheze event loop-ul
+    rows = await asyncio.to_thread(parse_master_csv, MASTER_CSV, days)
+    return await asyncio.to_thread(compute_trend_stats, rows)
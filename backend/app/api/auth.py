@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, utcnow
 from app.core.security import (
     verify_password,
     get_password_hash,
     create_access_token,
     get_current_user,
-    require_admin
+    require_admin,
+    invalidate_user_cache,
 )
+from app.core.cache_invalidation import invalidate_lookup
 from app.models import User
 from app.schemas import LoginRequest, TokenResponse, UserResponse, UserCreate, UserUpdate
 
@@ -30,7 +31,7 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     
     user = None
     for u in users:
-        if verify_password(request.cod_acces, u.cod_acces):
+        if await verify_password(request.cod_acces, u.cod_acces):
             user = u
             break
     
@@ -44,9 +45,10 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     await db.execute(
         update(User)
         .where(User.id == user.id)
-        .values(ultima_autentificare=datetime.utcnow())
+        .values(ultima_autentificare=utcnow())
     )
     await db.commit()
+    invalidate_user_cache()
     
     # Create token
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -103,12 +105,14 @@ async def create_user(
     user = User(
         username=user_data.username,
         nume_complet=user_data.nume_complet,
-        cod_acces=get_password_hash(user_data.cod_acces),
+        cod_acces=await get_password_hash(user_data.cod_acces),
         rol=user_data.rol
     )
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    invalidate_user_cache()
+    invalidate_lookup(User)
     
     return UserResponse.model_validate(user)
 
@@ -133,12 +137,14 @@ async def update_user(
     
     # Hash new password if provided
     if "cod_acces" in update_data:
-        update_data["cod_acces"] = get_password_hash(update_data["cod_acces"])
+        update_data["cod_acces"] = await get_password_hash(update_data["cod_acces"])
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
     await db.commit()
     await db.refresh(user)
+    invalidate_user_cache()
+    invalidate_lookup(User)
     
     return UserResponse.model_validate(user)
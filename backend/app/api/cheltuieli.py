@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text, and_
-from datetime import datetime, date
+from sqlalchemy.orm import load_only
+from datetime import date
 from typing import List, Optional
 from decimal import Decimal
 
-from app.core.database import get_db
+from app.core.database import get_db, utcnow
 from app.core.security import get_current_user, require_sef
+from app.core.lookup_cache import get_lookup_map
+from app.core.cache_invalidation import invalidate_raport_cache
 from app.models import User, Cheltuiala, Exercitiu, Nomenclator, Portofel, Categorie, Grupa
 from app.schemas import (
     CheltuialaCreate,
@@ -20,7 +23,7 @@ router = APIRouter(prefix="/cheltuieli", tags=["💰 Cheltuieli"])
 async def get_exercitiu_activ(db: AsyncSession) -> Exercitiu:
     """Get or create active exercitiu"""
     result = await db.execute(
-        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
     )
     exercitiu = result.scalar_one_or_none()
     
@@ -29,74 +32,79 @@ async def get_exercitiu_activ(db: AsyncSession) -> Exercitiu:
         exercitiu = Exercitiu(data=date.today(), activ=True)
         db.add(exercitiu)
         await db.commit()
+        invalidate_raport_cache()
         await db.refresh(exercitiu)
     
     return exercitiu
 
 
-async def enrich_cheltuiala(ch: Cheltuiala, db: AsyncSession) -> CheltuialaResponse:
-    """Add joined fields to cheltuiala response"""
-    data = CheltuialaResponse.model_validate(ch)
-    
-    # Get denumire from nomenclator or custom
-    if ch.nomenclator_id:
-        nom_result = await db.execute(
-            select(Nomenclator).where(Nomenclator.id == ch.nomenclator_id)
-        )
-        nom = nom_result.scalar_one_or_none()
-        if nom:
-            data.denumire = nom.denumire
-            if not ch.categorie_id:
-                data.categorie_id = nom.categorie_id
-            if not ch.grupa_id:
-                data.grupa_id = nom.grupa_id
-    else:
-        data.denumire = ch.denumire_custom
-    
-    # Get portofel name
-    if ch.portofel_id:
-        port_result = await db.execute(
-            select(Portofel.nume).where(Portofel.id == ch.portofel_id)
-        )
-        data.portofel_nume = port_result.scalar_one_or_none()
-    
-    # Get categorie info
-    cat_id = data.categorie_id or ch.categorie_id
-    if cat_id:
-        cat_result = await db.execute(
-            select(Categorie).where(Categorie.id == cat_id)
-        )
-        cat = cat_result.scalar_one_or_none()
+async def enrich_cheltuieli(cheltuieli: List[Cheltuiala], db: AsyncSession) -> List[CheltuialaResponse]:
+    """Add joined fields to cheltuieli responses (one lookup query per table, not per row)"""
+    if not cheltuieli:
+        return []
+
+    async def fetch_map(model, ids, *options):
+        ids = {i for i in ids if i}
+        if not ids:
+            return {}
+        result = await db.execute(select(model).options(*options).where(model.id.in_(ids)))
+        return {row.id: row for row in result.scalars().all()}
+
+    # load_only: skip the embedding vector, only the lookup fields are needed
+    nom_map = await fetch_map(
+        Nomenclator, (ch.nomenclator_id for ch in cheltuieli),
+        load_only(Nomenclator.denumire, Nomenclator.categorie_id, Nomenclator.grupa_id)
+    )
+
+    response = []
+    for ch in cheltuieli:
+        data = CheltuialaResponse.model_validate(ch)
+        # Get denumire from nomenclator or custom
+        if ch.nomenclator_id:
+            nom = nom_map.get(ch.nomenclator_id)
+            if nom:
+                data.denumire = nom.denumire
+                if not ch.categorie_id:
+                    data.categorie_id = nom.categorie_id
+                if not ch.grupa_id:
+                    data.grupa_id = nom.grupa_id
+        else:
+            data.denumire = ch.denumire_custom
+        response.append(data)
+
+    # Portofele / categorii / grupe / users: tabele mici, servite din lookup_cache
+    port_map = await get_lookup_map(db, Portofel)
+    cat_map = await get_lookup_map(db, Categorie)
+    grupa_map = await get_lookup_map(db, Grupa)
+    user_map = await get_lookup_map(db, User)
+    ex_map = await fetch_map(Exercitiu, (ch.exercitiu_id for ch in cheltuieli))
+
+    for ch, data in zip(cheltuieli, response):
+        port = port_map.get(ch.portofel_id)
+        data.portofel_nume = port.nume if port else None
+
+        cat = cat_map.get(data.categorie_id)
         if cat:
             data.categorie_nume = cat.nume
             data.categorie_culoare = cat.culoare
-    
-    # Get grupa name
-    grupa_id = data.grupa_id or ch.grupa_id
-    if grupa_id:
-        grupa_result = await db.execute(
-            select(Grupa.nume).where(Grupa.id == grupa_id)
-        )
-        data.grupa_nume = grupa_result.scalar_one_or_none()
-    
-    # Get operator name
-    if ch.operator_id:
-        op_result = await db.execute(
-            select(User.nume_complet).where(User.id == ch.operator_id)
-        )
-        data.operator_nume = op_result.scalar_one_or_none()
 
-    # Get exercitiu info
-    if ch.exercitiu_id:
-        ex_result = await db.execute(
-            select(Exercitiu).where(Exercitiu.id == ch.exercitiu_id)
-        )
-        ex = ex_result.scalar_one_or_none()
+        grupa = grupa_map.get(data.grupa_id)
+        data.grupa_nume = grupa.nume if grupa else None
+
+        op = user_map.get(ch.operator_id)
+        data.operator_nume = op.nume_complet if op else None
+
+        ex = ex_map.get(ch.exercitiu_id)
         if ex:
             data.exercitiu_data = ex.data
             data.exercitiu_activ = ex.activ
 
-    return data
+    return response
+
+
+async def enrich_cheltuiala(ch: Cheltuiala, db: AsyncSession) -> CheltuialaResponse:
+    """Add joined fields to cheltuiala response"""
+    return (await enrich_cheltuieli([ch], db))[0]
 
 
 @router.get("", response_model=List[CheltuialaResponse])
@@ -154,12 +162,7 @@ async def list_cheltuieli(
     result = await db.execute(query)
     cheltuieli = result.scalars().all()
     
-    response = []
-    for ch in cheltuieli:
-        enriched = await enrich_cheltuiala(ch, db)
-        response.append(enriched)
-    
-    return response
+    return await enrich_cheltuieli(cheltuieli, db)
 
 
 @router.post("", response_model=CheltuialaResponse, status_code=201)
@@ -198,7 +201,7 @@ async def create_cheltuiala(
             
             # Update nomenclator usage
             nom.frecventa_utilizare += 1
-            nom.ultima_utilizare = datetime.utcnow()
+            nom.ultima_utilizare = utcnow()
     
     # Create cheltuiala
     cheltuiala = Cheltuiala(
@@ -218,6 +221,7 @@ async def create_cheltuiala(
     
     db.add(cheltuiala)
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(cheltuiala)
     
     return await enrich_cheltuiala(cheltuiala, db)
@@ -283,12 +287,13 @@ async def update_cheltuiala(
     # Handle verificat update
     if "verificat" in update_data and update_data["verificat"]:
         update_data["verificat_de"] = current_user.id
-        update_data["verificat_la"] = datetime.utcnow()
+        update_data["verificat_la"] = utcnow()
 
     for field, value in update_data.items():
         setattr(cheltuiala, field, value)
 
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(cheltuiala)
 
     return await enrich_cheltuiala(cheltuiala, db)
@@ -325,6 +330,7 @@ async def delete_cheltuiala(
 
     cheltuiala.activ = False
     await db.commit()
+    invalidate_raport_cache()
 
     return {"status": "deleted", "id": cheltuiala_id}
 
@@ -348,9 +354,10 @@ async def verifica_cheltuiala(
     
     cheltuiala.verificat = True
     cheltuiala.verificat_de = current_user.id
-    cheltuiala.verificat_la = datetime.utcnow()
+    cheltuiala.verificat_la = utcnow()
     
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(cheltuiala)
     
     return await enrich_cheltuiala(cheltuiala, db)
@@ -376,8 +383,9 @@ async def bulk_verifica(
     for ch in cheltuieli:
         ch.verificat = True
         ch.verificat_de = current_user.id
-        ch.verificat_la = datetime.utcnow()
+        ch.verificat_la = utcnow()
     
     await db.commit()
+    invalidate_raport_cache()
     
     return {"status": "ok", "verified": len(cheltuieli)}
@@ -17,12 +17,10 @@ router = APIRouter(tags=["hass"])
 
 async def _get_hass_config() -> tuple[str, str]:
     async with AsyncSessionLocal() as db:
-        r1 = await db.execute(select(Setting).where(Setting.cheie == "hass_url"))
-        r2 = await db.execute(select(Setting).where(Setting.cheie == "hass_token"))
-        url_s = r1.scalar_one_or_none()
-        tok_s = r2.scalar_one_or_none()
-        url = (url_s.valoare or "").strip() if url_s else ""
-        token = (tok_s.valoare or "").strip() if tok_s else ""
+        url = await db.scalar(select(Setting.valoare).where(Setting.cheie == "hass_url"))
+        token = await db.scalar(select(Setting.valoare).where(Setting.cheie == "hass_token"))
+        url = (url or "").strip()
+        token = (token or "").strip()
     if not url or not token:
         raise HTTPException(
             status_code=400,
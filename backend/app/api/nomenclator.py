@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, func, text
-from datetime import datetime
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, utcnow
 from app.core.security import get_current_user, require_admin
 from app.models import User, Nomenclator, Categorie, Grupa, Cheltuiala
 from app.schemas import (
@@ -30,9 +29,9 @@ async def autocomplete(
     - Folosește pg_trgm pentru fuzzy search
     - Folosește AI embeddings dacă sunt disponibile
     """
-    # Update AI settings from database before searching
-    await ai_service.update_settings(db)
-    results = await ai_service.autocomplete_ai(q, db, limit)
+    results = ai_service.cached_autocomplete(q, limit)
+    if results is None:
+        results = await ai_service.autocomplete_ai(q, db, limit)
     return [AutocompleteResult(**r) for r in results]
 
 
@@ -118,6 +117,7 @@ async def create_nomenclator(
     db.add(item)
     await db.commit()
     await db.refresh(item)
+    ai_service.invalidate_autocomplete_cache()
     
     response = NomenclatorResponse.model_validate(item)
     
@@ -172,6 +172,7 @@ async def update_nomenclator(
         setattr(item, field, value)
     
     await db.commit()
+    ai_service.invalidate_autocomplete_cache()
     await db.refresh(item)
     
     response = NomenclatorResponse.model_validate(item)
@@ -221,7 +222,7 @@ async def update_usage(
         .where(Nomenclator.id == item_id)
         .values(
             frecventa_utilizare=Nomenclator.frecventa_utilizare + 1,
-            ultima_utilizare=datetime.utcnow()
+            ultima_utilizare=utcnow()
         )
     )
     await db.commit()
@@ -269,6 +270,7 @@ async def asociaza_neasociate(
     )
     updated_count = result.rowcount
     await db.commit()
+    ai_service.invalidate_autocomplete_cache()
 
     return {"updated": updated_count, "nomenclator_id": nomenclator_id}
 
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, text
 from datetime import date
 from typing import List, Optional
 from decimal import Decimal
 
 from app.core.database import get_db
 from app.core.security import get_current_user, require_admin, require_sef
-from app.models import User, Portofel, Transfer, Alimentare, Exercitiu, Cheltuiala, Categorie
+from app.core.cache_invalidation import invalidate_raport_cache, invalidate_lookup
+from app.models import User, Portofel, Transfer, Alimentare, Exercitiu
 from app.schemas import (
     PortofelCreate,
     PortofelUpdate,
@@ -56,7 +57,7 @@ async def get_solduri_portofele(
     # Get exercitiu id
     if not exercitiu_id:
         result = await db.execute(
-            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
         )
         row = result.first()
         exercitiu_id = row.id if row else None
@@ -67,149 +68,47 @@ async def get_solduri_portofele(
     )
     portofele = result.scalars().all()
 
+    sold_total = await _solduri_per_portofel(db)
+    sold_zi = await _solduri_per_portofel(db, exercitiu_id) if exercitiu_id else {}
+
     response = []
     for p in portofele:
         data = PortofelSoldResponse.model_validate(p)
-
-        # Compute sold_total (all-time) per currency: alimentari - cheltuieli + incasari + transfers_in - transfers_out
-        ali_res = await db.execute(
-            select(Alimentare.moneda, func.coalesce(func.sum(Alimentare.suma), 0))
-            .where(Alimentare.portofel_id == p.id)
-            .group_by(Alimentare.moneda)
-        )
-        ali_map = {row[0]: row[1] for row in ali_res.all() if row[1]}
-
-        ch_res = await db.execute(
-            select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-            .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-            .where(
-                Cheltuiala.portofel_id == p.id,
-                Cheltuiala.activ == True,
-                Cheltuiala.sens == 'Cheltuiala',
-                Cheltuiala.neplatit == False,
-                or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-            )
-            .group_by(Cheltuiala.moneda)
-        )
-        ch_map = {row[0]: row[1] for row in ch_res.all() if row[1]}
-
-        # Get incasari (sens='Incasare') — adds to sold
-        inc_res = await db.execute(
-            select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-            .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-            .where(
-                Cheltuiala.portofel_id == p.id,
-                Cheltuiala.activ == True,
-                Cheltuiala.sens == 'Incasare',
-                Cheltuiala.neplatit == False,
-                or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-            )
-            .group_by(Cheltuiala.moneda)
-        )
-        inc_map = {row[0]: row[1] for row in inc_res.all() if row[1]}
-
-        # Transfers IN: use moneda_dest/suma_dest when set (cross-currency)
-        tin_res = await db.execute(
-            select(Transfer).where(Transfer.portofel_dest_id == p.id)
-        )
-        tin_map: dict[str, Decimal] = {}
-        for t in tin_res.scalars().all():
-            m = t.moneda_dest or t.moneda or 'RON'
-            s = t.suma_dest if t.moneda_dest else t.suma
-            tin_map[m] = tin_map.get(m, Decimal("0")) + s
-
-        tout_res = await db.execute(
-            select(Transfer.moneda, func.coalesce(func.sum(Transfer.suma), 0))
-            .where(Transfer.portofel_sursa_id == p.id)
-            .group_by(Transfer.moneda)
-        )
-        tout_map = {row[0]: row[1] for row in tout_res.all() if row[1]}
-
-        all_currencies = set(list(ali_map.keys()) + list(ch_map.keys()) + list(inc_map.keys()) + list(tin_map.keys()) + list(tout_map.keys()))
-        sold_total = {}
-        for cur in all_currencies:
-            val = (ali_map.get(cur, Decimal("0"))
-                   - ch_map.get(cur, Decimal("0"))
-                   + inc_map.get(cur, Decimal("0"))
-                   + tin_map.get(cur, Decimal("0"))
-                   - tout_map.get(cur, Decimal("0")))
-            if val != Decimal("0"):
-                sold_total[cur] = val
-        data.sold_total = sold_total
-
-        # Compute sold_zi_curenta (current exercitiu) per currency
+        data.sold_total = sold_total.get(p.id, {})
         if exercitiu_id:
-            ali_zi = await db.execute(
-                select(Alimentare.moneda, func.coalesce(func.sum(Alimentare.suma), 0))
-                .where(Alimentare.portofel_id == p.id, Alimentare.exercitiu_id == exercitiu_id)
-                .group_by(Alimentare.moneda)
-            )
-            ali_zi_map = {row[0]: row[1] for row in ali_zi.all() if row[1]}
-
-            ch_zi = await db.execute(
-                select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-                .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-                .where(
-                    Cheltuiala.portofel_id == p.id,
-                    Cheltuiala.exercitiu_id == exercitiu_id,
-                    Cheltuiala.activ == True,
-                    Cheltuiala.sens == 'Cheltuiala',
-                    Cheltuiala.neplatit == False,
-                    or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-                )
-                .group_by(Cheltuiala.moneda)
-            )
-            ch_zi_map = {row[0]: row[1] for row in ch_zi.all() if row[1]}
-
-            inc_zi = await db.execute(
-                select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-                .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-                .where(
-                    Cheltuiala.portofel_id == p.id,
-                    Cheltuiala.exercitiu_id == exercitiu_id,
-                    Cheltuiala.activ == True,
-                    Cheltuiala.sens == 'Incasare',
-                    Cheltuiala.neplatit == False,
-                    or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-                )
-                .group_by(Cheltuiala.moneda)
-            )
-            inc_zi_map = {row[0]: row[1] for row in inc_zi.all() if row[1]}
-
-            # Transfers IN: use moneda_dest/suma_dest when set
-            tin_zi = await db.execute(
-                select(Transfer).where(Transfer.portofel_dest_id == p.id, Transfer.exercitiu_id == exercitiu_id)
-            )
-            tin_zi_map: dict[str, Decimal] = {}
-            for t in tin_zi.scalars().all():
-                m = t.moneda_dest or t.moneda or 'RON'
-                s = t.suma_dest if t.moneda_dest else t.suma
-                tin_zi_map[m] = tin_zi_map.get(m, Decimal("0")) + s
-
-            tout_zi = await db.execute(
-                select(Transfer.moneda, func.coalesce(func.sum(Transfer.suma), 0))
-                .where(Transfer.portofel_sursa_id == p.id, Transfer.exercitiu_id == exercitiu_id)
-                .group_by(Transfer.moneda)
-            )
-            tout_zi_map = {row[0]: row[1] for row in tout_zi.all() if row[1]}
-
-            zi_currencies = set(list(ali_zi_map.keys()) + list(ch_zi_map.keys()) + list(inc_zi_map.keys()) + list(tin_zi_map.keys()) + list(tout_zi_map.keys()))
-            sold_zi = {}
-            for cur in zi_currencies:
-                val = (ali_zi_map.get(cur, Decimal("0"))
-                       - ch_zi_map.get(cur, Decimal("0"))
-                       + inc_zi_map.get(cur, Decimal("0"))
-                       + tin_zi_map.get(cur, Decimal("0"))
-                       - tout_zi_map.get(cur, Decimal("0")))
-                if val != Decimal("0"):
-                    sold_zi[cur] = val
-            data.sold_zi_curenta = sold_zi
-
+            data.sold_zi_curenta = sold_zi.get(p.id, {})
         response.append(data)
 
     return response
 
 
+async def _solduri_per_portofel(
+    db: AsyncSession,
+    exercitiu_id: Optional[int] = None
+) -> dict[int, dict[str, Decimal]]:
+    """
+    Sold per portofel și monedă: alimentari - cheltuieli + incasari + transfers_in - transfers_out.
+    Citit din sold_portofel_moneda (totaluri per exercițiu întreținute de triggere, vezi
+    migration_sold_portofel_moneda.sql) — un singur query grupat; fără exercitiu_id = all-time.
+    """
+    result = await db.execute(
+        text(f"""
+            SELECT portofel_id, moneda,
+                   SUM(CASE WHEN tip IN ('Cheltuiala', 'transfer_out') THEN -suma ELSE suma END)
+            FROM sold_portofel_moneda
+            {"WHERE exercitiu_id = :exercitiu_id" if exercitiu_id else ""}
+            GROUP BY portofel_id, moneda
+        """),
+        {"exercitiu_id": exercitiu_id} if exercitiu_id else {}
+    )
+
+    sold: dict[int, dict[str, Decimal]] = {}
+    for portofel_id, moneda, suma in result.all():
+        if suma:
+            sold.setdefault(portofel_id, {})[moneda] = suma
+    return sold
+
+
 @router.post("/portofele", response_model=PortofelResponse, status_code=201)
 async def create_portofel(
     data: PortofelCreate,
@@ -227,6 +126,7 @@ async def create_portofel(
     portofel = Portofel(**data.model_dump())
     db.add(portofel)
     await db.commit()
+    invalidate_lookup(Portofel)
     await db.refresh(portofel)
     
     return PortofelResponse.model_validate(portofel)
@@ -253,6 +153,7 @@ async def update_portofel(
         setattr(portofel, field, value)
     
     await db.commit()
+    invalidate_lookup(Portofel)
     await db.refresh(portofel)
     
     return PortofelResponse.model_validate(portofel)
@@ -288,7 +189,7 @@ async def list_alimentari(
     else:
         # Default to active exercitiu
         ex_result = await db.execute(
-            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
         )
         row = ex_result.first()
         if row:
@@ -322,7 +223,7 @@ async def create_alimentare(
     """Alimentează portofel"""
     # Get active exercitiu
     result = await db.execute(
-        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
     )
     exercitiu = result.scalar_one_or_none()
     
@@ -331,6 +232,7 @@ async def create_alimentare(
         exercitiu = Exercitiu(data=date.today(), activ=True)
         db.add(exercitiu)
         await db.commit()
+        invalidate_raport_cache()
         await db.refresh(exercitiu)
     
     alimentare = Alimentare(
@@ -344,6 +246,7 @@ async def create_alimentare(
     
     db.add(alimentare)
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(alimentare)
     
     response = AlimentareResponse.model_validate(alimentare)
@@ -378,6 +281,7 @@ async def update_alimentare(
         setattr(alimentare, field, value)
 
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(alimentare)
 
     response = AlimentareResponse.model_validate(alimentare)
@@ -406,6 +310,7 @@ async def delete_alimentare(
 
     await db.delete(alimentare)
     await db.commit()
+    invalidate_raport_cache()
 
 
 # ============================================
@@ -438,7 +343,7 @@ async def list_transferuri(
     else:
         # Default to active exercitiu
         ex_result = await db.execute(
-            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+            select(Exercitiu.id).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
         )
         row = ex_result.first()
         if row:
@@ -480,7 +385,7 @@ async def create_transfer(
     
     # Get active exercitiu
     result = await db.execute(
-        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc())
+        select(Exercitiu).where(Exercitiu.activ == True).order_by(Exercitiu.data.desc()).limit(1)
     )
     exercitiu = result.scalar_one_or_none()
     
@@ -488,6 +393,7 @@ async def create_transfer(
         exercitiu = Exercitiu(data=date.today(), activ=True)
         db.add(exercitiu)
         await db.commit()
+        invalidate_raport_cache()
         await db.refresh(exercitiu)
     
     # Create transfer
@@ -505,6 +411,7 @@ async def create_transfer(
     
     db.add(transfer)
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(transfer)
     
     response = TransferResponse.model_validate(transfer)
@@ -548,6 +455,7 @@ async def update_transfer(
         raise HTTPException(status_code=400, detail="Portofelele trebuie să fie diferite")
 
     await db.commit()
+    invalidate_raport_cache()
     await db.refresh(transfer)
 
     response = TransferResponse.model_validate(transfer)
@@ -581,3 +489,4 @@ async def delete_transfer(
 
     await db.delete(transfer)
     await db.commit()
+    invalidate_raport_cache()
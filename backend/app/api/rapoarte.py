@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text, func, or_, case
+from sqlalchemy import select, text, func, or_, and_, case, literal_column
+from sqlalchemy.orm import raiseload
 from datetime import datetime, date, timedelta
 from typing import List, Optional
 from decimal import Decimal
 from collections import defaultdict
+from pydantic import TypeAdapter
 
-from app.core.database import get_db
+from app.core.database import get_db, utcnow
 from app.core.security import get_current_user, require_sef
+from app.core.cache_invalidation import raport_cache, invalidate_raport_cache
 from app.models import (
-    User, Exercitiu, Cheltuiala, Portofel, Categorie, Grupa, 
-    Nomenclator, Alimentare, Transfer
+    User, Exercitiu, Cheltuiala, Portofel, Categorie, Grupa, Nomenclator
 )
 from app.schemas import (
     ExercitiumCreate,
@@ -25,6 +28,20 @@ from app.schemas import (
 
 router = APIRouter(tags=["📅 Exerciții & Rapoarte"])
 
+# ---------------------------------------------------------------------------
+# Cache raport zilnic — JSON serializat, pe (exercitiu_id, data_raport) din query.
+# Raportul nu depinde de utilizator, deci cheia nu include user.id.
+# Ținut în app.core.cache_invalidation, golit acolo la orice scriere pe
+# cheltuieli/alimentari/transferuri/exercitii și pe portofele/categorii/grupe.
+# ---------------------------------------------------------------------------
+RAPORT_CACHE_TTL = 5.0  # secunde
+RAPORT_CACHE_MAX = 64   # intrări; peste limită iese cea mai veche folosită (LRU)
+
+
+# Serializer pentru /rapoarte/perioada: scrie lista direct în JSON (pydantic-core),
+# fără trecerea prin jsonable_encoder a FastAPI
+_rapoarte_json = TypeAdapter(List[RaportZilnic])
+
 
 # ============================================
 # EXERCITII
@@ -55,6 +72,7 @@ async def get_exercitiu_curent(
         select(Exercitiu)
         .where(Exercitiu.activ == True)
         .order_by(Exercitiu.data.desc())
+        .limit(1)
     )
     exercitiu = result.scalar_one_or_none()
 
@@ -84,6 +102,7 @@ async def get_exercitiu_curent(
             db.add(exercitiu)
         await db.commit()
         await db.refresh(exercitiu)
+        invalidate_raport_cache()
 
     return ExercitiumResponse.model_validate(exercitiu)
 
@@ -119,6 +138,7 @@ async def create_exercitiu(
     db.add(exercitiu)
     await db.commit()
     await db.refresh(exercitiu)
+    invalidate_raport_cache()
     
     return ExercitiumResponse.model_validate(exercitiu)
 
@@ -134,6 +154,7 @@ async def inchide_exercitiu(
         select(Exercitiu)
         .where(Exercitiu.activ == True)
         .order_by(Exercitiu.data.desc())
+        .limit(1)
     )
     exercitiu = result.scalar_one_or_none()
     
@@ -141,13 +162,14 @@ async def inchide_exercitiu(
         raise HTTPException(status_code=404, detail="Nu există exercițiu activ")
     
     exercitiu.activ = False
-    exercitiu.ora_inchidere = datetime.utcnow()
+    exercitiu.ora_inchidere = utcnow()
     exercitiu.inchis_de = current_user.id
     if data.observatii:
         exercitiu.observatii = data.observatii
     
     await db.commit()
     await db.refresh(exercitiu)
+    invalidate_raport_cache()
     
     return ExercitiumResponse.model_validate(exercitiu)
 
@@ -174,108 +196,191 @@ async def get_exercitiu(
 # RAPOARTE
 # ============================================
 
-@router.get("/rapoarte/zilnic", response_model=RaportZilnic)
-async def get_raport_zilnic(
-    exercitiu_id: Optional[int] = Query(None),
-    data_raport: Optional[date] = Query(None),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+ZERO = Decimal("0")  # shared default for per-currency sums (Decimal is immutable)
+
+
+def _add_to_dict(d: dict, moneda: str, val: Decimal):
+    """Adună val la totalul pe monedă"""
+    d[moneda] = d.get(moneda, ZERO) + val
+
+
+def _add_dicts(dst: dict, src: dict) -> dict:
+    """Adună totalurile din src în dst (in-place) și întoarce dst"""
+    for k, v in src.items():
+        dst[k] = dst.get(k, ZERO) + v
+    return dst
+
+
+def _merge_dicts(a: dict, b: dict) -> dict:
+    return _add_dicts(dict(a), b)
+
+
+async def _fetch_raport_cheltuieli(db: AsyncSession, ex_ids: List[int]) -> dict[int, list]:
     """
-    Raport zilnic grupat pe Categorie → Grupă → Denumire
-    Default: exercițiul activ
+    Cheltuielile active (sens='Cheltuiala') ale exercițiilor date, grupate pe exercitiu_id.
+    Plain rows (no ORM hydration) with categorie/grupa/denumire already resolved
+    through nomenclator by the JOIN.
     """
-    # Get exercitiu
-    if exercitiu_id:
-        result = await db.execute(
-            select(Exercitiu).where(Exercitiu.id == exercitiu_id)
-        )
-    elif data_raport:
-        result = await db.execute(
-            select(Exercitiu).where(Exercitiu.data == data_raport)
-        )
-    else:
-        result = await db.execute(
-            select(Exercitiu)
-            .where(Exercitiu.activ == True)
-            .order_by(Exercitiu.data.desc())
-        )
-    
-    exercitiu = result.scalar_one_or_none()
-    
-    if not exercitiu:
-        # Return empty report
-        return RaportZilnic(
-            exercitiu_id=0,
-            data=date.today(),
-            activ=False,
-            categorii=[],
-            portofele=[],
-            total_cheltuieli={},
-            total_neplatit={},
-            total_sold={}
-        )
-    
-    # Get all categorii
-    cat_result = await db.execute(
-        select(Categorie)
-        .where(Categorie.activ == True)
-        .order_by(Categorie.ordine)
-    )
-    categorii = cat_result.scalars().all()
-    
-    # Get cheltuieli for this exercitiu
     ch_result = await db.execute(
-        select(Cheltuiala)
+        select(
+            Cheltuiala.id,
+            Cheltuiala.exercitiu_id,
+            func.coalesce(Cheltuiala.categorie_id, Nomenclator.categorie_id).label('categorie_id'),
+            func.coalesce(Cheltuiala.grupa_id, Nomenclator.grupa_id).label('grupa_id'),
+            case(
+                (Cheltuiala.nomenclator_id != None, func.coalesce(func.nullif(Nomenclator.denumire, ''), 'N/A')),
+                else_=func.coalesce(func.nullif(Cheltuiala.denumire_custom, ''), 'N/A')
+            ).label('denumire'),
+            func.coalesce(Cheltuiala.moneda, literal_column("'RON'")).label('moneda'),
+            Cheltuiala.suma,
+            Cheltuiala.neplatit,
+            Cheltuiala.verificat,
+        )
+        .outerjoin(Nomenclator, Cheltuiala.nomenclator_id == Nomenclator.id)
         .where(
-            Cheltuiala.exercitiu_id == exercitiu.id,
+            Cheltuiala.exercitiu_id.in_(ex_ids),
             Cheltuiala.activ == True,
             Cheltuiala.sens == 'Cheltuiala'
         )
         .order_by(Cheltuiala.created_at.desc())
     )
-    cheltuieli = ch_result.scalars().all()
-    
-    # Helper to add to a per-currency dict
-    def add_to_dict(d: dict, moneda: str, val: Decimal):
-        d[moneda] = d.get(moneda, Decimal("0")) + val
+    ch_by_ex = defaultdict(list)
+    for ch in ch_result.all():
+        ch_by_ex[ch.exercitiu_id].append(ch)
+    return ch_by_ex
 
-    def merge_dicts(a: dict, b: dict) -> dict:
-        result = dict(a)
-        for k, v in b.items():
-            result[k] = result.get(k, Decimal("0")) + v
-        return result
 
-    # Build categorii report
+async def _fetch_portofel_aggs(db: AsyncSession, ex_ids: List[int]) -> dict:
+    """
+    Per-portofel aggregates from sold_portofel_moneda (kept up to date by triggers,
+    see migration_sold_portofel_moneda.sql) — one indexed read, no scan of the base tables.
+    The sold itself (ali - chelt + incasari + transf_in - transf_out) is summed as
+    NUMERIC in the same query, under tip 'sold'.
+    Returns {exercitiu_id: {portofel_id: {tip: {moneda: suma}}}}.
+    """
+    agg_result = await db.execute(
+        text("""
+            SELECT tip, exercitiu_id, portofel_id, moneda, suma
+            FROM sold_portofel_moneda
+            WHERE exercitiu_id = ANY(:ex_ids)
+            UNION ALL
+            SELECT 'sold', exercitiu_id, portofel_id, moneda,
+                   SUM(CASE WHEN tip IN ('Cheltuiala', 'transfer_out') THEN -suma ELSE suma END)
+            FROM sold_portofel_moneda
+            WHERE exercitiu_id = ANY(:ex_ids)
+            GROUP BY exercitiu_id, portofel_id, moneda
+        """),
+        {"ex_ids": ex_ids}
+    )
+    aggs: dict = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
+    for tip, ex_id, portofel_id, moneda, suma in agg_result.all():
+        if suma:
+            aggs[ex_id][portofel_id][tip][moneda] = suma
+    return aggs
+
+
+async def _fetch_totaluri(db: AsyncSession, ex_ids: List[int]) -> dict:
+    """
+    Total cheltuieli plătite / neplătite pe exercițiu și monedă, agregate în SQL.
+    Aceleași reguli ca raportul: categoria/grupa se rezolvă și prin nomenclator;
+    intră cheltuielile necategorizate și cele din categorii active cu afecteaza_sold
+    (fără grupă sau într-o grupă activă a categoriei).
+    Returns {exercitiu_id: (total_cheltuieli, total_neplatit)}.
+    """
+    cat_id = func.coalesce(Cheltuiala.categorie_id, Nomenclator.categorie_id)
+    grupa_id = func.coalesce(Cheltuiala.grupa_id, Nomenclator.grupa_id)
+    moneda = func.coalesce(Cheltuiala.moneda, literal_column("'RON'"))
+    neplatit = Cheltuiala.neplatit.is_(True)
+    result = await db.execute(
+        select(Cheltuiala.exercitiu_id, neplatit, moneda, func.sum(Cheltuiala.suma))
+        .outerjoin(Nomenclator, Cheltuiala.nomenclator_id == Nomenclator.id)
+        .outerjoin(Categorie, and_(Categorie.id == cat_id, Categorie.activ == True))
+        .outerjoin(Grupa, and_(Grupa.id == grupa_id, Grupa.categorie_id == Categorie.id, Grupa.activ == True))
+        .where(
+            Cheltuiala.exercitiu_id.in_(ex_ids),
+            Cheltuiala.activ == True,
+            Cheltuiala.sens == 'Cheltuiala',
+            or_(
+                Categorie.id == None,
+                and_(Categorie.afecteaza_sold == True, or_(grupa_id == None, Grupa.id != None))
+            )
+        )
+        .group_by(Cheltuiala.exercitiu_id, neplatit, moneda)
+    )
+    totaluri: dict = defaultdict(lambda: ({}, {}))
+    for ex_id, is_neplatit, m, suma in result.all():
+        if suma:
+            totaluri[ex_id][1 if is_neplatit else 0][m] = suma
+    return totaluri
+
+
+def _build_raport(
+    exercitiu: Exercitiu,
+    categorii,
+    grupe_by_cat: dict,
+    cheltuieli,
+    portofele,
+    aggs: dict,
+    totaluri: tuple
+) -> RaportZilnic:
+    """Construiește raportul unui exercițiu din date deja încărcate (fără query-uri)"""
+    # Most reports hold a single currency: then totals are plain Decimal sums,
+    # wrapped in a one-key dict only at the end
+    monede = {ch.moneda for ch in cheltuieli}
+    single_moneda = next(iter(monede)) if len(monede) == 1 else None
+
+    def build_items(chs) -> tuple[list, dict, dict]:
+        """Itemii unei grupe + totalurile platit/neplatit pe monedă"""
+        items = [
+            RaportCategorieItem.model_construct(
+                denumire=ch.denumire,
+                suma=ch.suma,
+                moneda=ch.moneda,
+                neplatit=ch.neplatit,
+                verificat=ch.verificat,
+                cheltuiala_id=ch.id
+            )
+            for ch in chs
+        ]
+
+        if single_moneda is not None:
+            platit_sum = neplatit_sum = None
+            for ch in chs:
+                if ch.neplatit:
+                    neplatit_sum = ch.suma if neplatit_sum is None else neplatit_sum + ch.suma
+                else:
+                    platit_sum = ch.suma if platit_sum is None else platit_sum + ch.suma
+            return (
+                items,
+                {single_moneda: platit_sum} if platit_sum is not None else {},
+                {single_moneda: neplatit_sum} if neplatit_sum is not None else {},
+            )
+
+        platit: dict[str, Decimal] = {}
+        neplatit: dict[str, Decimal] = {}
+        for ch in chs:
+            _add_to_dict(neplatit if ch.neplatit else platit, ch.moneda, ch.suma)
+        return items, platit, neplatit
+
+    # Build categorii report. Values come straight from the DB with known types,
+    # so the Raport* models are built with model_construct (no validation pass).
     categorii_report = []
-    total_cheltuieli: dict[str, Decimal] = {}
-    total_neplatit: dict[str, Decimal] = {}
-    matched_ch_ids = set()
+
+    # Bucket cheltuieli by resolved categorie in a single pass; anything without an
+    # active categorie goes straight to "Necategorizate" (order preserved)
+    cat_ids = {cat.id for cat in categorii}
+    ch_by_cat = defaultdict(list)
+    unmatched = []
+    for ch in cheltuieli:
+        if ch.categorie_id in cat_ids:
+            ch_by_cat[ch.categorie_id].append(ch)
+        else:
+            unmatched.append(ch)
 
     for cat in categorii:
-        # Get grupe for this categorie
-        grupe_result = await db.execute(
-            select(Grupa)
-            .where(Grupa.categorie_id == cat.id, Grupa.activ == True)
-            .order_by(Grupa.ordine)
-        )
-        grupe = grupe_result.scalars().all()
-
-        # Filter cheltuieli for this categorie
-        cat_cheltuieli = []
-        for ch in cheltuieli:
-            ch_cat_id = ch.categorie_id
-            if not ch_cat_id and ch.nomenclator_id:
-                nom_result = await db.execute(
-                    select(Nomenclator.categorie_id).where(Nomenclator.id == ch.nomenclator_id)
-                )
-                ch_cat_id = nom_result.scalar_one_or_none()
-
-            if ch_cat_id == cat.id:
-                cat_cheltuieli.append(ch)
-                matched_ch_ids.add(ch.id)
-
-        if not cat_cheltuieli and not grupe:
+        cat_cheltuieli = ch_by_cat.get(cat.id)
+        # A categorie without cheltuieli produces no grupe in the report
+        if not cat_cheltuieli:
             continue
 
         # Build grupe report
@@ -285,48 +390,18 @@ async def get_raport_zilnic(
 
         ch_by_grupa = defaultdict(list)
         for ch in cat_cheltuieli:
-            ch_grupa_id = ch.grupa_id
-            if not ch_grupa_id and ch.nomenclator_id:
-                nom_result = await db.execute(
-                    select(Nomenclator.grupa_id).where(Nomenclator.id == ch.nomenclator_id)
-                )
-                ch_grupa_id = nom_result.scalar_one_or_none()
-            ch_by_grupa[ch_grupa_id].append(ch)
-
-        for grupa in grupe:
+            ch_by_grupa[ch.grupa_id].append(ch)
+
+        for grupa in grupe_by_cat.get(cat.id, []):
             grupa_cheltuieli = ch_by_grupa.get(grupa.id, [])
             if not grupa_cheltuieli:
                 continue
 
-            items = []
-            grupa_total: dict[str, Decimal] = {}
-
-            for ch in grupa_cheltuieli:
-                if ch.nomenclator_id:
-                    nom_result = await db.execute(
-                        select(Nomenclator.denumire).where(Nomenclator.id == ch.nomenclator_id)
-                    )
-                    denumire = nom_result.scalar_one_or_none() or "N/A"
-                else:
-                    denumire = ch.denumire_custom or "N/A"
-
-                m = ch.moneda or 'RON'
-                items.append(RaportCategorieItem(
-                    denumire=denumire,
-                    suma=ch.suma,
-                    moneda=m,
-                    neplatit=ch.neplatit,
-                    verificat=ch.verificat,
-                    cheltuiala_id=ch.id
-                ))
-
-                if ch.neplatit:
-                    add_to_dict(cat_total_neplatit, m, ch.suma)
-                else:
-                    add_to_dict(cat_total_platit, m, ch.suma)
-                    add_to_dict(grupa_total, m, ch.suma)
+            items, grupa_total, grupa_neplatit = build_items(grupa_cheltuieli)
+            _add_dicts(cat_total_platit, grupa_total)
+            _add_dicts(cat_total_neplatit, grupa_neplatit)
 
-            grupe_report.append(RaportGrupa(
+            grupe_report.append(RaportGrupa.model_construct(
                 grupa_id=grupa.id,
                 grupa_nume=grupa.nume,
                 items=items,
@@ -336,35 +411,11 @@ async def get_raport_zilnic(
         # Handle cheltuieli without grupa
         ungrouped = ch_by_grupa.get(None, [])
         if ungrouped:
-            items = []
-            ungrouped_total: dict[str, Decimal] = {}
-
-            for ch in ungrouped:
-                if ch.nomenclator_id:
-                    nom_result = await db.execute(
-                        select(Nomenclator.denumire).where(Nomenclator.id == ch.nomenclator_id)
-                    )
-                    denumire = nom_result.scalar_one_or_none() or "N/A"
-                else:
-                    denumire = ch.denumire_custom or "N/A"
-
-                m = ch.moneda or 'RON'
-                items.append(RaportCategorieItem(
-                    denumire=denumire,
-                    suma=ch.suma,
-                    moneda=m,
-                    neplatit=ch.neplatit,
-                    verificat=ch.verificat,
-                    cheltuiala_id=ch.id
-                ))
-
-                if ch.neplatit:
-                    add_to_dict(cat_total_neplatit, m, ch.suma)
-                else:
-                    add_to_dict(cat_total_platit, m, ch.suma)
-                    add_to_dict(ungrouped_total, m, ch.suma)
+            items, ungrouped_total, ungrouped_neplatit = build_items(ungrouped)
+            _add_dicts(cat_total_platit, ungrouped_total)
+            _add_dicts(cat_total_neplatit, ungrouped_neplatit)
 
-            grupe_report.append(RaportGrupa(
+            grupe_report.append(RaportGrupa.model_construct(
                 grupa_id=None,
                 grupa_nume="Alte",
                 items=items,
@@ -372,7 +423,7 @@ async def get_raport_zilnic(
             ))
 
         if grupe_report:
-            categorii_report.append(RaportCategorie(
+            categorii_report.append(RaportCategorie.model_construct(
                 categorie_id=cat.id,
                 categorie_nume=cat.nume,
                 categorie_culoare=cat.culoare,
@@ -380,50 +431,19 @@ async def get_raport_zilnic(
                 grupe=grupe_report,
                 total_platit=cat_total_platit,
                 total_neplatit=cat_total_neplatit,
-                total=merge_dicts(cat_total_platit, cat_total_neplatit)
+                total=_merge_dicts(cat_total_platit, cat_total_neplatit)
             ))
 
-            if cat.afecteaza_sold:
-                total_cheltuieli = merge_dicts(total_cheltuieli, cat_total_platit)
-                total_neplatit = merge_dicts(total_neplatit, cat_total_neplatit)
-
     # Handle uncategorized cheltuieli
-    unmatched = [ch for ch in cheltuieli if ch.id not in matched_ch_ids]
     if unmatched:
-        items = []
-        uncat_platit: dict[str, Decimal] = {}
-        uncat_neplatit: dict[str, Decimal] = {}
-
-        for ch in unmatched:
-            if ch.nomenclator_id:
-                nom_result = await db.execute(
-                    select(Nomenclator.denumire).where(Nomenclator.id == ch.nomenclator_id)
-                )
-                denumire = nom_result.scalar_one_or_none() or "N/A"
-            else:
-                denumire = ch.denumire_custom or "N/A"
-
-            m = ch.moneda or 'RON'
-            items.append(RaportCategorieItem(
-                denumire=denumire,
-                suma=ch.suma,
-                moneda=m,
-                neplatit=ch.neplatit,
-                verificat=ch.verificat,
-                cheltuiala_id=ch.id
-            ))
+        items, uncat_platit, uncat_neplatit = build_items(unmatched)
 
-            if ch.neplatit:
-                add_to_dict(uncat_neplatit, m, ch.suma)
-            else:
-                add_to_dict(uncat_platit, m, ch.suma)
-
-        categorii_report.append(RaportCategorie(
+        categorii_report.append(RaportCategorie.model_construct(
             categorie_id=0,
             categorie_nume="Necategorizate",
             categorie_culoare="#9CA3AF",
             afecteaza_sold=True,
-            grupe=[RaportGrupa(
+            grupe=[RaportGrupa.model_construct(
                 grupa_id=None,
                 grupa_nume="Alte",
                 items=items,
@@ -431,99 +451,24 @@ async def get_raport_zilnic(
             )],
             total_platit=uncat_platit,
             total_neplatit=uncat_neplatit,
-            total=merge_dicts(uncat_platit, uncat_neplatit)
+            total=_merge_dicts(uncat_platit, uncat_neplatit)
         ))
-        total_cheltuieli = merge_dicts(total_cheltuieli, uncat_platit)
-        total_neplatit = merge_dicts(total_neplatit, uncat_neplatit)
-
-    # Get portofele solduri
-    port_result = await db.execute(
-        select(Portofel)
-        .where(Portofel.activ == True)
-        .order_by(Portofel.ordine)
-    )
-    portofele = port_result.scalars().all()
 
     portofele_report = []
     total_sold: dict[str, Decimal] = {}
 
     for p in portofele:
-        # Get alimentari grouped by moneda
-        alim_result = await db.execute(
-            select(Alimentare.moneda, func.coalesce(func.sum(Alimentare.suma), 0))
-            .where(Alimentare.portofel_id == p.id, Alimentare.exercitiu_id == exercitiu.id)
-            .group_by(Alimentare.moneda)
-        )
-        p_alimentari = {row[0]: row[1] for row in alim_result.all() if row[1]}
-
-        # Get cheltuieli grouped by moneda (only categories with afecteaza_sold=True)
-        ch_result = await db.execute(
-            select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-            .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-            .where(
-                Cheltuiala.portofel_id == p.id,
-                Cheltuiala.exercitiu_id == exercitiu.id,
-                Cheltuiala.activ == True,
-                Cheltuiala.sens == 'Cheltuiala',
-                Cheltuiala.neplatit == False,
-                or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-            )
-            .group_by(Cheltuiala.moneda)
-        )
-        p_cheltuieli = {row[0]: row[1] for row in ch_result.all() if row[1]}
-
-        # Get incasari (sens='Incasare') — adds to sold
-        inc_result = await db.execute(
-            select(Cheltuiala.moneda, func.coalesce(func.sum(Cheltuiala.suma), 0))
-            .outerjoin(Categorie, Cheltuiala.categorie_id == Categorie.id)
-            .where(
-                Cheltuiala.portofel_id == p.id,
-                Cheltuiala.exercitiu_id == exercitiu.id,
-                Cheltuiala.activ == True,
-                Cheltuiala.sens == 'Incasare',
-                Cheltuiala.neplatit == False,
-                or_(Categorie.afecteaza_sold == True, Cheltuiala.categorie_id == None)
-            )
-            .group_by(Cheltuiala.moneda)
-        )
-        p_incasari = {row[0]: row[1] for row in inc_result.all() if row[1]}
-
-        # Get transfers IN grouped by dest currency (use moneda_dest/suma_dest when set)
-        tin_result = await db.execute(
-            select(Transfer).where(Transfer.portofel_dest_id == p.id, Transfer.exercitiu_id == exercitiu.id)
-        )
-        p_transferuri_in: dict[str, Decimal] = {}
-        for t in tin_result.scalars().all():
-            m = t.moneda_dest or t.moneda or 'RON'
-            s = t.suma_dest if t.moneda_dest else t.suma
-            p_transferuri_in[m] = p_transferuri_in.get(m, Decimal("0")) + s
-
-        # Get transfers OUT grouped by source moneda
-        tout_result = await db.execute(
-            select(Transfer.moneda, func.coalesce(func.sum(Transfer.suma), 0))
-            .where(Transfer.portofel_sursa_id == p.id, Transfer.exercitiu_id == exercitiu.id)
-            .group_by(Transfer.moneda)
-        )
-        p_transferuri_out = {row[0]: row[1] for row in tout_result.all() if row[1]}
-
-        # Compute per-currency sold: ali - chelt + incasari + transf_in - transf_out
-        all_currencies = set(list(p_alimentari.keys()) + list(p_cheltuieli.keys()) +
-                            list(p_incasari.keys()) + list(p_transferuri_in.keys()) + list(p_transferuri_out.keys()))
-        p_sold: dict[str, Decimal] = {}
-        for currency in all_currencies:
-            val = (p_alimentari.get(currency, Decimal("0"))
-                   - p_cheltuieli.get(currency, Decimal("0"))
-                   + p_incasari.get(currency, Decimal("0"))
-                   + p_transferuri_in.get(currency, Decimal("0"))
-                   - p_transferuri_out.get(currency, Decimal("0")))
-            if val != Decimal("0"):
-                p_sold[currency] = val
+        p_aggs = aggs.get(p.id, {})
+        p_alimentari = p_aggs.get('alimentari', {})
+        p_cheltuieli = p_aggs.get('Cheltuiala', {})
+        p_transferuri_in = p_aggs.get('transfer_in', {})
+        p_transferuri_out = p_aggs.get('transfer_out', {})
+        p_sold = p_aggs.get('sold', {})
 
         # Accumulate into total_sold
-        for currency, val in p_sold.items():
-            total_sold[currency] = total_sold.get(currency, Decimal("0")) + val
+        _add_dicts(total_sold, p_sold)
 
-        portofele_report.append(RaportPortofel(
+        portofele_report.append(RaportPortofel.model_construct(
             portofel_id=p.id,
             portofel_nume=p.nume,
             sold=p_sold,
@@ -533,12 +478,15 @@ async def get_raport_zilnic(
             total_transferuri_out=p_transferuri_out
         ))
 
+    # Totals over categorii come pre-aggregated from SQL (_fetch_totaluri)
+    total_cheltuieli, total_neplatit = totaluri
+
     # Filter out zero-value currencies
-    total_sold_filtered = {k: v for k, v in total_sold.items() if v != Decimal("0")}
-    total_cheltuieli_filtered = {k: v for k, v in total_cheltuieli.items() if v != Decimal("0")}
-    total_neplatit_filtered = {k: v for k, v in total_neplatit.items() if v != Decimal("0")}
+    total_sold_filtered = {k: v for k, v in total_sold.items() if v != ZERO}
+    total_cheltuieli_filtered = {k: v for k, v in total_cheltuieli.items() if v != ZERO}
+    total_neplatit_filtered = {k: v for k, v in total_neplatit.items() if v != ZERO}
 
-    return RaportZilnic(
+    return RaportZilnic.model_construct(
         exercitiu_id=exercitiu.id,
         data=exercitiu.data,
         activ=exercitiu.activ,
@@ -550,7 +498,125 @@ async def get_raport_zilnic(
     )
 
 
-@router.get("/rapoarte/perioada")
+async def _load_raport_shared(db: AsyncSession):
+    """Categorii, grupe (pe categorie) și portofele active — identice pentru orice exercițiu
+
+    Relațiile sunt raiseload: raportul folosește doar coloanele, un lazy load
+    accidental trebuie să cadă imediat, nu să devină N+1.
+    """
+    cat_result = await db.execute(
+        select(Categorie)
+        .where(Categorie.activ == True)
+        .order_by(Categorie.ordine)
+        .options(raiseload("*"))
+    )
+    categorii = cat_result.scalars().all()
+
+    grupe_result = await db.execute(
+        select(Grupa)
+        .where(Grupa.categorie_id.in_([c.id for c in categorii]), Grupa.activ == True)
+        .order_by(Grupa.ordine)
+        .options(raiseload("*"))
+    )
+    grupe_by_cat = defaultdict(list)
+    for g in grupe_result.scalars().all():
+        grupe_by_cat[g.categorie_id].append(g)
+
+    port_result = await db.execute(
+        select(Portofel)
+        .where(Portofel.activ == True)
+        .order_by(Portofel.ordine)
+        .options(raiseload("*"))
+    )
+    portofele = port_result.scalars().all()
+
+    return categorii, grupe_by_cat, portofele
+
+
+async def _begin_snapshot(db: AsyncSession) -> None:
+    """Tranzacție REPEATABLE READ pe sesiunea cererii: toate query-urile raportului văd același snapshot"""
+    # Închide tranzacția deschisă eventual de dependențe (ex. get_current_user); doar citiri până aici
+    await db.commit()
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+async def _load_raport_data(db: AsyncSession, ex_ids: List[int]):
+    """Toate datele unui raport, pe sesiunea cererii (o singură conexiune, un singur snapshot)"""
+    shared = await _load_raport_shared(db)
+    ch_by_ex = await _fetch_raport_cheltuieli(db, ex_ids)
+    aggs = await _fetch_portofel_aggs(db, ex_ids)
+    totaluri = await _fetch_totaluri(db, ex_ids)
+    return shared, ch_by_ex, aggs, totaluri
+
+
+@router.get("/rapoarte/zilnic", response_model=RaportZilnic)
+async def get_raport_zilnic(
+    exercitiu_id: Optional[int] = Query(None),
+    data_raport: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Raport zilnic grupat pe Categorie → Grupă → Denumire
+    Default: exercițiul activ
+    """
+    cache_key = (exercitiu_id, data_raport)
+    cached = raport_cache.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        raport_cache.move_to_end(cache_key)
+        return Response(content=cached[1], media_type="application/json")
+
+    await _begin_snapshot(db)
+
+    # Get exercitiu
+    if exercitiu_id:
+        result = await db.execute(
+            select(Exercitiu).where(Exercitiu.id == exercitiu_id)
+        )
+    elif data_raport:
+        result = await db.execute(
+            select(Exercitiu).where(Exercitiu.data == data_raport)
+        )
+    else:
+        result = await db.execute(
+            select(Exercitiu)
+            .where(Exercitiu.activ == True)
+            .order_by(Exercitiu.data.desc())
+            .limit(1)
+        )
+    
+    exercitiu = result.scalar_one_or_none()
+    
+    if not exercitiu:
+        # Return empty report
+        return RaportZilnic.model_construct(
+            exercitiu_id=0,
+            data=date.today(),
+            activ=False,
+            categorii=[],
+            portofele=[],
+            total_cheltuieli={},
+            total_neplatit={},
+            total_sold={}
+        )
+
+    shared, ch_by_ex, aggs, totaluri = await _load_raport_data(db, [exercitiu.id])
+    categorii, grupe_by_cat, portofele = shared
+
+    raport = _build_raport(
+        exercitiu, categorii, grupe_by_cat, ch_by_ex.get(exercitiu.id, []), portofele,
+        aggs.get(exercitiu.id, {}), totaluri[exercitiu.id]
+    )
+
+    body = raport.model_dump_json()
+    raport_cache[cache_key] = (time.monotonic() + RAPORT_CACHE_TTL, body)
+    raport_cache.move_to_end(cache_key)
+    while len(raport_cache) > RAPORT_CACHE_MAX:
+        raport_cache.popitem(last=False)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/rapoarte/perioada", response_model=List[RaportZilnic])
 async def get_raport_perioada(
     data_start: date = Query(...),
     data_end: date = Query(...),
@@ -566,6 +632,8 @@ async def get_raport_perioada(
     
     if (data_end - data_start).days > 90:
         raise HTTPException(status_code=400, detail="Perioada maximă este de 90 de zile")
+
+    await _begin_snapshot(db)
     
     # Get exercitii in range
     result = await db.execute(
@@ -574,10 +642,20 @@ async def get_raport_perioada(
         .order_by(Exercitiu.data.desc())
     )
     exercitii = result.scalars().all()
-    
-    rapoarte = []
-    for ex in exercitii:
-        raport = await get_raport_zilnic(exercitiu_id=ex.id, db=db, current_user=current_user)
-        rapoarte.append(raport)
-    
-    return rapoarte
+    if not exercitii:
+        return Response(content=b"[]", media_type="application/json")
+
+    # Shared data once, per-exercitiu data in batched queries for the whole range
+    ex_ids = [ex.id for ex in exercitii]
+    shared, ch_by_ex, aggs, totaluri = await _load_raport_data(db, ex_ids)
+    categorii, grupe_by_cat, portofele = shared
+
+    rapoarte = [
+        _build_raport(
+            ex, categorii, grupe_by_cat, ch_by_ex.get(ex.id, []), portofele,
+            aggs.get(ex.id, {}), totaluri[ex.id]
+        )
+        for ex in exercitii
+    ]
+    # response_model rămâne doar pentru OpenAPI; corpul e serializat o singură dată aici
+    return Response(content=_rapoarte_json.dump_json(rapoarte), media_type="application/json")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, Query, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import date, datetime
 
 from app.core.database import get_db
@@ -32,34 +33,21 @@ async def upsert_recomandari(
     top_lucruri_bune = summary.get("top_lucruri_bune", [])
     tip_apeluri = summary.get("tip_apeluri", {})
 
-    result = await db.execute(
-        select(RecomandariApeluri).where(
-            RecomandariApeluri.data == data_date,
-            RecomandariApeluri.ai_model == ai_model
-        )
+    # Single atomic upsert on the (data, ai_model) unique constraint
+    values = dict(
+        total_conversatii=total_conversatii,
+        conversations=conversations,
+        top_recomandari=top_recomandari,
+        top_lucruri_bune=top_lucruri_bune,
+        tip_apeluri=tip_apeluri,
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.total_conversatii = total_conversatii
-        existing.conversations = conversations
-        existing.top_recomandari = top_recomandari
-        existing.top_lucruri_bune = top_lucruri_bune
-        existing.tip_apeluri = tip_apeluri
-        record_id = existing.id
-    else:
-        record = RecomandariApeluri(
-            data=data_date,
-            ai_model=ai_model,
-            total_conversatii=total_conversatii,
-            conversations=conversations,
-            top_recomandari=top_recomandari,
-            top_lucruri_bune=top_lucruri_bune,
-            tip_apeluri=tip_apeluri,
-        )
-        db.add(record)
-        await db.flush()
-        record_id = record.id
+    stmt = (
+        pg_insert(RecomandariApeluri)
+        .values(data=data_date, ai_model=ai_model, **values)
+        .on_conflict_do_update(index_elements=['data', 'ai_model'], set_=values)
+        .returning(RecomandariApeluri.id)
+    )
+    record_id = (await db.execute(stmt)).scalar_one()
 
     return {"status": "ok", "data": str(data_date), "ai_model": ai_model, "id": record_id}
 
@@ -117,12 +105,10 @@ async def get_zile_disponibile(
     current_user=Depends(get_current_user),
 ):
     """Returns list of dates that have recomandari data, optionally filtered by AI model."""
-    query = select(RecomandariApeluri.data).order_by(RecomandariApeluri.data.desc())
+    query = select(RecomandariApeluri.data).distinct().order_by(RecomandariApeluri.data.desc())
 
     if ai_model and ai_model in ['Claude', 'Ollama']:
         query = query.where(RecomandariApeluri.ai_model == ai_model)
 
     result = await db.execute(query)
-    # Get unique dates
-    dates = sorted(list(set(str(row[0]) for row in result.fetchall())), reverse=True)
-    return dates
+    return [str(d) for d in result.scalars().all()]
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
+from sqlalchemy.orm import selectinload
 from typing import List, Dict, Optional
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
+import asyncio
+import json
+import time
 import httpx
 
-from app.core.database import get_db
+from app.core.database import get_db, engine, AsyncSessionLocal
 from app.core.security import get_current_user, require_admin, require_sef
+from app.core.cache_invalidation import invalidate_lookup
 from app.models import User, Setting, Categorie, Grupa, SysLog
 
 SET_FILE = Path("/opt/cheltuieli-v2.1/.set")
@@ -32,6 +38,33 @@ router = APIRouter(tags=["⚙️ Setări & AI"])
 # SETTINGS
 # ============================================
 
+# Last successful Ollama probe — the admin UI polls /settings/ollama/test
+OLLAMA_PROBE_TTL = 30.0  # secunde
+_ollama_probe: Dict = {"result": None, "expires": 0.0}
+
+
+async def _refresh_ai_settings():
+    """Reîncarcă setările AI pe o sesiune proprie (rulează ca background task)"""
+    async with AsyncSessionLocal() as session:
+        await ai_service.update_settings(session)
+
+
+# Valori de setări citite des și schimbate rar (ex: ai_chat_enabled la fiecare /chat)
+SETTING_CACHE_TTL = 60.0  # secunde
+_setting_cache: Dict[str, tuple] = {}
+
+
+async def _get_setting_cached(db: AsyncSession, cheie: str) -> Optional[str]:
+    """Valoarea unei setări, din cache dacă e mai nouă de SETTING_CACHE_TTL"""
+    hit = _setting_cache.get(cheie)
+    now = time.monotonic()
+    if hit and now - hit[0] < SETTING_CACHE_TTL:
+        return hit[1]
+    valoare = await db.scalar(select(Setting.valoare).where(Setting.cheie == cheie))
+    _setting_cache[cheie] = (now, valoare)
+    return valoare
+
+
 @router.get("/settings", response_model=List[SettingResponse])
 async def list_settings(
     db: AsyncSession = Depends(get_db),
@@ -69,8 +102,30 @@ async def test_ollama_connection(
     current_user: User = Depends(require_admin)
 ):
     """Testează conexiunea la Ollama"""
+    if _ollama_probe["result"] is not None and _ollama_probe["expires"] > time.monotonic():
+        return _ollama_probe["result"]
+
     await ai_service.update_settings(db)
-    return await ai_service.test_connection()
+    result = await ai_service.test_connection()
+    if result.get("status") == "connected":
+        _ollama_probe["result"] = result
+        _ollama_probe["expires"] = time.monotonic() + OLLAMA_PROBE_TTL
+    return result
+
+
+@router.get("/settings/db/pool")
+async def get_db_pool_status(
+    current_user: User = Depends(require_admin)
+):
+    """Starea pool-ului de conexiuni la baza de date"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "status": pool.status(),
+    }
 
 
 @router.get("/settings/bearer-token")
@@ -158,10 +213,24 @@ async def reset_serpapi_counters(
     return {"ok": True, "month": current_month}
 
 
+def _after_setting_change(cheie: str, background_tasks: BackgroundTasks) -> None:
+    """Invalidează ce depinde de setarea scrisă (comun pentru PUT și PATCH)"""
+    _setting_cache.pop(cheie, None)
+    ai_service.invalidate_settings()
+    if cheie.startswith(("ai_", "ollama_")):
+        # Alt model / AI pornit-oprit: sugestiile cache-uite nu mai sunt valabile
+        ai_service.invalidate_autocomplete_cache()
+    # Update AI service if needed (after the response; the probe cache is stale now)
+    if cheie.startswith('ollama'):
+        _ollama_probe["result"] = None
+        background_tasks.add_task(_refresh_ai_settings)
+
+
 @router.put("/settings/{cheie}", response_model=SettingResponse)
 async def upsert_setting(
     cheie: str,
     data: SettingUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
@@ -178,6 +247,7 @@ async def upsert_setting(
         db.add(setting)
     await db.commit()
     await db.refresh(setting)
+    _after_setting_change(cheie, background_tasks)
     return SettingResponse.model_validate(setting)
 
 
@@ -203,6 +273,7 @@ async def get_setting(
 async def update_setting(
     cheie: str,
     data: SettingUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
@@ -220,10 +291,7 @@ async def update_setting(
 
     await db.commit()
     await db.refresh(setting)
-
-    # Update AI service if needed
-    if cheie.startswith('ollama'):
-        await ai_service.update_settings(db)
+    _after_setting_change(cheie, background_tasks)
 
     return SettingResponse.model_validate(setting)
 
@@ -263,6 +331,7 @@ async def create_categorie(
     categorie = Categorie(**data.model_dump())
     db.add(categorie)
     await db.commit()
+    invalidate_lookup(Categorie)
     await db.refresh(categorie)
     
     return CategorieResponse.model_validate(categorie)
@@ -289,6 +358,7 @@ async def update_categorie(
         setattr(categorie, field, value)
     
     await db.commit()
+    invalidate_lookup(Categorie)
     await db.refresh(categorie)
     
     return CategorieResponse.model_validate(categorie)
@@ -306,7 +376,7 @@ async def list_grupe(
     current_user: User = Depends(get_current_user)
 ):
     """Lista grupe. Fără parametru activ = toate."""
-    query = select(Grupa)
+    query = select(Grupa).options(selectinload(Grupa.categorie))
     if activ is not None:
         query = query.where(Grupa.activ == activ)
     
@@ -321,18 +391,24 @@ async def list_grupe(
     response = []
     for g in grupe:
         data = GrupaResponse.model_validate(g)
-        
-        if g.categorie_id:
-            cat_result = await db.execute(
-                select(Categorie.nume).where(Categorie.id == g.categorie_id)
-            )
-            data.categorie_nume = cat_result.scalar_one_or_none()
-        
+        data.categorie_nume = g.categorie.nume if g.categorie else None
         response.append(data)
     
     return response
 
 
+async def _grupa_response(db: AsyncSession, grupa_id: int) -> GrupaResponse:
+    """Grupa (cu valorile generate de DB) + numele categoriei, într-un singur SELECT cu JOIN"""
+    row = (await db.execute(
+        select(Grupa, Categorie.nume)
+        .outerjoin(Categorie, Categorie.id == Grupa.categorie_id)
+        .where(Grupa.id == grupa_id)
+    )).one()
+    response = GrupaResponse.model_validate(row[0])
+    response.categorie_nume = row[1]
+    return response
+
+
 @router.post("/grupe", response_model=GrupaResponse, status_code=201)
 async def create_grupa(
     data: GrupaCreate,
@@ -342,17 +418,11 @@ async def create_grupa(
     """Creează grupă nouă (doar admin)"""
     grupa = Grupa(**data.model_dump())
     db.add(grupa)
+    await db.flush()
+
+    response = await _grupa_response(db, grupa.id)
     await db.commit()
-    await db.refresh(grupa)
-    
-    response = GrupaResponse.model_validate(grupa)
-    
-    if grupa.categorie_id:
-        cat_result = await db.execute(
-            select(Categorie.nume).where(Categorie.id == grupa.categorie_id)
-        )
-        response.categorie_nume = cat_result.scalar_one_or_none()
-    
+    invalidate_lookup(Grupa)
     return response
 
 
@@ -376,17 +446,11 @@ async def update_grupa(
     for field, value in update_data.items():
         setattr(grupa, field, value)
     
+    await db.flush()
+
+    response = await _grupa_response(db, grupa.id)
     await db.commit()
-    await db.refresh(grupa)
-    
-    response = GrupaResponse.model_validate(grupa)
-    
-    if grupa.categorie_id:
-        cat_result = await db.execute(
-            select(Categorie.nume).where(Categorie.id == grupa.categorie_id)
-        )
-        response.categorie_nume = cat_result.scalar_one_or_none()
-    
+    invalidate_lookup(Grupa)
     return response
 
 
@@ -468,7 +532,6 @@ async def get_furnizori(
         vendors = data.get("results", data.get("result", data.get("data", [])))
 
     # Cache vendor names for autocomplete search
-    import json
     names = [v.get("name", "") for v in vendors if v.get("name")]
     cache_result = await db.execute(select(Setting).where(Setting.cheie == 'furnizori_cache'))
     cache_setting = cache_result.scalar_one_or_none()
@@ -477,6 +540,8 @@ async def get_furnizori(
     else:
         db.add(Setting(cheie='furnizori_cache', valoare=json.dumps(names), tip='string'))
     await db.commit()
+    ai_service.invalidate_settings()
+    ai_service.invalidate_autocomplete_cache()
 
     return {"vendors": vendors, "count": len(vendors)}
 
@@ -495,17 +560,47 @@ async def chat_with_ai(
     Chat cu AI BigBoss (doar șef/admin)
     Poate întreba despre cheltuieli, solduri, statistici
     """
-    # Check if AI chat is enabled
-    result = await db.execute(
-        select(Setting).where(Setting.cheie == 'ai_chat_enabled')
+    # Check if AI chat is enabled; setările AI se reîncarcă în paralel pe sesiune proprie
+    chat_enabled, _ = await asyncio.gather(
+        _get_setting_cached(db, 'ai_chat_enabled'),
+        _refresh_ai_settings(),
     )
-    setting = result.scalar_one_or_none()
-    
-    if not setting or setting.valoare != 'true':
+
+    if chat_enabled != 'true':
         raise HTTPException(status_code=400, detail="Chat AI nu este activat")
-    
-    await ai_service.update_settings(db)
-    response = await ai_service.chat(request.message, db, current_user.id)
+
+    response = await ai_service.chat(request.message, current_user.id)
+    return ChatResponse(response=response)
+
+
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_sef)
+):
+    """
+    Chat cu AI BigBoss, răspuns în flux (SSE): evenimente token, apoi done.
+    Primele cuvinte ajung imediat, fără să aștepte tot răspunsul Ollama.
+    """
+    chat_enabled, _ = await asyncio.gather(
+        _get_setting_cached(db, 'ai_chat_enabled'),
+        _refresh_ai_settings(),
+    )
+
+    if chat_enabled != 'true':
+        raise HTTPException(status_code=400, detail="Chat AI nu este activat")
+
+    async def _stream():
+        async for token in ai_service.chat_stream(request.message, current_user.id):
+            yield f"data: {json.dumps({'type': 'token', 'content': token}, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ============================================
@@ -0,0 +1,27 @@
+"""Invalidarea cache-urilor in-process după scrieri, într-un singur loc.
+
+Routerele apelează de aici după commit, nu din modulele care țin cache-urile:
+- invalidate_raport_cache(): scrieri pe datele zilei (cheltuieli, alimentari,
+  transferuri, exerciții) - rapoarte zilnice + contextul chat AI
+- invalidate_lookup(*models): scrieri pe portofele/categorii/grupe/users -
+  lookup-urile modelului + tot ce afișează numele lor
+"""
+from collections import OrderedDict
+
+from app.core.lookup_cache import invalidate_lookup_cache
+from app.services import ai_service
+
+# Raport zilnic JSON: key -> (expires, body); citit/scris de app.api.rapoarte
+raport_cache: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+
+
+def invalidate_raport_cache() -> None:
+    """Invalidează rapoartele zilnice cache-uite și contextul chat AI (apelat după scrieri)."""
+    raport_cache.clear()
+    ai_service.invalidate_chat_context()
+
+
+def invalidate_lookup(*models) -> None:
+    """Invalidează lookup-urile pentru models (toate dacă lipsesc) și rapoartele care le afișează."""
+    invalidate_lookup_cache(*models)
+    invalidate_raport_cache()
@@ -1,21 +1,59 @@
+import asyncio
+from datetime import datetime, timezone
+
+from pgvector.utils import from_db, from_db_binary, to_db_binary
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
 from app.core.config import settings
 
-# Convert postgresql:// to postgresql+asyncpg://
-DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+# Convert postgresql:// (or postgres://) to postgresql+asyncpg://
+DATABASE_URL = settings.DATABASE_URL
+for _scheme in ("postgresql://", "postgres://"):
+    if DATABASE_URL.startswith(_scheme):
+        DATABASE_URL = "postgresql+asyncpg://" + DATABASE_URL[len(_scheme):]
+        break
 
 engine = create_async_engine(
     DATABASE_URL,
     echo=settings.DEBUG,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
 )
 
+
+def _encode_vector(value):
+    # Vector() din modele trimite deja textul '[...]'; parametrii din text() trimit liste
+    if isinstance(value, str):
+        value = from_db(value)
+    return to_db_binary(value)
+
+
+async def _register_vector_codec(conn):
+    await conn.set_type_codec(
+        "vector", encoder=_encode_vector, decoder=from_db_binary, format="binary"
+    )
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    """pgvector în format binar pe fiecare conexiune asyncpg nouă (fără text '[...]' pe fir)"""
+    dbapi_connection.run_async(_register_vector_codec)
+
+
+class AppSession(Session):
+    """Sesiunea sync din spatele AsyncSessionLocal (țintă pentru event listeners, fără Session global)"""
+
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=AppSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -24,6 +62,11 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    """Ora UTC curentă, naivă: coloanele DateTime din modele sunt TIMESTAMP fără timezone"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 async def get_db():
     """Dependency for getting database session"""
     async with AsyncSessionLocal() as session:
@@ -38,7 +81,12 @@ async def get_db():
 
 
 async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
-        # Tables are created by init.sql in Docker
-        pass
+    """Initialize database tables and pre-open DB_POOL_WARM pool connections"""
+    # Tables are created by init.sql in Docker. Connections are opened concurrently
+    # and returned to the pool, so the first requests don't pay the connect + auth.
+    async def _open():
+        async with engine.connect():
+            pass
+
+    warm = max(1, min(settings.DB_POOL_WARM, settings.DB_POOL_SIZE))
+    await asyncio.gather(*(_open() for _ in range(warm)))
@@ -0,0 +1,70 @@
+"""In-process cache for the small lookup tables (portofele, categorii, grupe, users).
+
+The whole table is loaded once as plain rows and served from memory for
+LOOKUP_CACHE_TTL seconds. All columns are kept unless the model is listed in
+_LOOKUP_COLUMNS, and inactive rows are included because old cheltuieli may
+still point at them.
+
+The write endpoints call app.core.cache_invalidation.invalidate_lookup() after
+they commit. As a safety net, ORM writes made through AsyncSessionLocal
+(AppSession) drop the model's entry when their transaction commits.
+"""
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AppSession
+from app.models import Categorie, Grupa, Portofel, User
+
+LOOKUP_CACHE_TTL = 60.0  # secunde
+CACHED_MODELS = (Portofel, Categorie, Grupa, User)
+
+# Coloanele ținute în cache, unde nu e tot tabelul (users: fără cod_acces)
+_LOOKUP_COLUMNS = {
+    User: (User.id, User.username, User.nume_complet, User.rol, User.activ),
+}
+
+_lookup_cache: dict[type, tuple[float, dict]] = {}  # model -> (expires, {id: row})
+
+
+def invalidate_lookup_cache(*models) -> None:
+    """Drop the cached tables for the given models (all of them if none given)."""
+    for model in models or CACHED_MODELS:
+        _lookup_cache.pop(model, None)
+
+
+async def get_lookup_map(db: AsyncSession, model) -> dict:
+    """{id: row} for a whole lookup table; rows are immutable, attribute access like the model."""
+    cached = _lookup_cache.get(model)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    columns = _LOOKUP_COLUMNS.get(model) or model.__table__.columns
+    result = await db.execute(select(*columns))
+    rows = {row.id: row for row in result.all()}
+    _lookup_cache[model] = (time.monotonic() + LOOKUP_CACHE_TTL, rows)
+    return rows
+
+
+@event.listens_for(AppSession, "after_flush")
+def _mark_lookup_writes(session, flush_context):
+    touched = {
+        type(obj)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, CACHED_MODELS)
+    }
+    if touched:
+        session.info.setdefault("lookup_cache_dirty", set()).update(touched)
+
+
+@event.listens_for(AppSession, "after_commit")
+def _invalidate_after_commit(session):
+    touched = session.info.pop("lookup_cache_dirty", None)
+    if touched:
+        invalidate_lookup_cache(*touched)
+
+
+@event.listens_for(AppSession, "after_soft_rollback")
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop("lookup_cache_dirty", None)
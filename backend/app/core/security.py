@@ -1,6 +1,10 @@
-from datetime import datetime, timedelta
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
+import asyncio
+import time
+import jwt
+from jwt import InvalidTokenError as JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -12,34 +16,60 @@ from app.core.database import get_db
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+ACCESS_TOKEN_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_SECRET_KEY = settings.SECRET_KEY
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [settings.ALGORITHM]
 
+# token -> (expires, CurrentUser): scutește decode + SELECT users la fiecare request
+USER_CACHE_TTL = 30.0  # secunde
+USER_CACHE_MAX = 1024  # intrări
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
 
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Utilizatorul autentificat (read-only, fără cod_acces) - compatibil cu UserResponse"""
+    id: int
+    username: str
+    nume_complet: str
+    rol: str
+    activ: bool
+    ultima_autentificare: Optional[datetime]
+    created_at: datetime
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+
+_USER_COLS = tuple(f.name for f in fields(CurrentUser))
+_user_cache: dict[str, tuple[float, CurrentUser]] = {}
+
+
+def invalidate_user_cache() -> None:
+    """Invalidează utilizatorii cache-uiți (apelat după orice modificare în users)."""
+    _user_cache.clear()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (bcrypt runs in a thread, not on the event loop)"""
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    """Hash a password (bcrypt runs in a thread, not on the event loop)"""
+    return await asyncio.to_thread(pwd_context.hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    expire = datetime.now(timezone.utc) + (expires_delta or ACCESS_TOKEN_TTL)
+    to_encode.update({"exp": int(expire.timestamp())})
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=_ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
     """Decode JWT token"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _SECRET_KEY, algorithms=_ALGORITHMS)
         return payload
     except JWTError:
         return None
@@ -59,6 +89,10 @@ async def get_current_user(
     )
     
     token = credentials.credentials
+    cached = _user_cache.get(token)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     payload = decode_token(token)
     
     if payload is None:
@@ -70,13 +104,25 @@ async def get_current_user(
     user_id = int(sub)
     
     result = await db.execute(
-        select(User).where(User.id == user_id, User.activ == True)
+        select(*(getattr(User, col) for col in _USER_COLS))
+        .where(User.id == user_id, User.activ == True)
     )
-    user = result.scalar_one_or_none()
-    
-    if user is None:
+    row = result.one_or_none()
+
+    if row is None:
         raise credentials_exception
-    
+    user = CurrentUser(**row._mapping)
+
+    # Nu ține în cache mai mult decât mai e valabil token-ul
+    ttl = min(USER_CACHE_TTL, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        if len(_user_cache) >= USER_CACHE_MAX:
+            _user_cache.clear()
+        _user_cache[token] = (
+            time.monotonic() + ttl,
+            user,
+        )
+
     return user
 
 
@@ -89,8 +135,10 @@ async def get_current_active_user(current_user = Depends(get_current_user)):
 
 def require_role(allowed_roles: list):
     """Dependency factory for role-based access"""
+    allowed = frozenset(allowed_roles)
+
     async def role_checker(current_user = Depends(get_current_user)):
-        if current_user.rol not in allowed_roles:
+        if current_user.rol not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acces interzis pentru acest rol"
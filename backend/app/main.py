@@ -5,14 +5,16 @@ import asyncio
 import json
 from datetime import datetime, date, time, timedelta
 from pathlib import Path
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.config import settings
 from app.core.database import init_db, AsyncSessionLocal
 from app.core.log import write_log
-from app.models import Exercitiu, ApeluriZilnic, ApeluriDetalii, MapPin
+from app.models import ApeluriZilnic, ApeluriDetalii, MapPin
 from app.api import api_router
 from app.api.apeluri import compute_stats
+from app.core.cache_invalidation import invalidate_raport_cache
 from app.models import AmiApel
 from app.api.lista_apeluri import ami_event_loop
 from app.api.pontaj import pontaj_fetch_loop
@@ -21,26 +23,46 @@ from app.api.erp_prod import erp_prod_sync_loop
 from app.api.orders import orders_sync_loop
 from app.api.predictii import load_models_on_startup, watch_models_loop
 from app.api.comenzi import sync_harta_loop
+from app.services.ai_service import ai_service
 
 AUTO_CLOSE_HOUR = 7   # 07:00
 SAVE_APELURI_HOUR = 23  # 23:00
+APELURI_DETALII_COLS = ("callid", "caller_id", "agent", "status", "ora", "hold_time", "call_time")
 GOOGLE_REVIEWS_REFRESH_HOURS = [14, 21]  # 14:00 și 21:00
 GOOGLE_REVIEWS_ANALYSIS_HOURS = [12, 21]  # 12:00 și 21:00
 SERPAPI_ACCOUNT_FETCH_HOUR = 8  # 08:00
 
 
+def _next_daily_run(hour: int) -> tuple[datetime, float]:
+    """Next local hour:00 and seconds until it.
+
+    Both ends are offset-aware, so a DST change in between is accounted for.
+    """
+    now = datetime.now().astimezone()
+    target = datetime.combine(now.date(), time(hour, 0)).astimezone()
+    if now >= target:
+        target = datetime.combine(now.date() + timedelta(days=1), time(hour, 0)).astimezone()
+    return target, (target - now).total_seconds()
+
+
+async def _sleep_until(target: datetime, wait_secs: float):
+    """Sleep on the loop's monotonic clock, then re-check the wall clock.
+
+    If the system clock was set back meanwhile, keep waiting instead of firing
+    early (and then a second time at the real target).
+    """
+    while wait_secs > 0:
+        await asyncio.sleep(wait_secs)
+        wait_secs = (target - datetime.now().astimezone()).total_seconds()
+
+
 async def auto_close_exercitiu_loop():
     """Background task: auto-close exercitiu at 07:00 and open new one."""
     while True:
         try:
-            now = datetime.now()
-            # Calculate next 07:00
-            target = datetime.combine(now.date(), time(AUTO_CLOSE_HOUR, 0))
-            if now >= target:
-                target += timedelta(days=1)
-            wait_secs = (target - now).total_seconds()
+            target, wait_secs = _next_daily_run(AUTO_CLOSE_HOUR)
             print(f"Auto-close scheduler: next run at {target} (in {wait_secs:.0f}s)")
-            await asyncio.sleep(wait_secs)
+            await _sleep_until(target, wait_secs)
 
             await _do_auto_close()
         except asyncio.CancelledError:
@@ -54,40 +76,45 @@ async def auto_close_exercitiu_loop():
 
 async def _do_auto_close():
     """Close the active exercitiu and open a new one for today."""
+    today = date.today()
     async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Exercitiu)
-            .where(Exercitiu.activ == True)
-            .order_by(Exercitiu.data.desc())
-        )
-        exercitiu = result.scalar_one_or_none()
-
-        if not exercitiu:
-            print("Auto-close: no active exercitiu, creating one for today")
-        elif exercitiu.data >= date.today():
-            print(f"Auto-close: exercitiu {exercitiu.data} is current, closing it")
-            exercitiu.activ = False
-            exercitiu.ora_inchidere = datetime.now()
-            exercitiu.observatii = ((exercitiu.observatii or '') + ' [Închis automat 07:00]').strip()
-        else:
-            print(f"Auto-close: exercitiu {exercitiu.data} is from a past day, closing it")
-            exercitiu.activ = False
-            exercitiu.ora_inchidere = datetime.now()
-            exercitiu.observatii = ((exercitiu.observatii or '') + ' [Închis automat 07:00]').strip()
-
-        # Open new exercitiu for today
-        today = date.today()
-        existing = await session.execute(
-            select(Exercitiu).where(Exercitiu.data == today)
-        )
-        if existing.scalar_one_or_none() is None:
-            new_ex = Exercitiu(data=today, activ=True)
-            session.add(new_ex)
-            print(f"Auto-close: opened new exercitiu for {today}")
-        else:
-            print(f"Auto-close: exercitiu for {today} already exists")
-
+        # Un singur statement: închide exercițiul activ și deschide ziua curentă
+        # (data e UNIQUE, deci ON CONFLICT acoperă ziua deja existentă)
+        row = (await session.execute(text("""
+            WITH closed AS (
+                UPDATE exercitii
+                SET activ = false,
+                    ora_inchidere = :now,
+                    observatii = BTRIM(COALESCE(observatii, '') || ' [Închis automat 07:00]')
+                WHERE id = (
+                    SELECT id FROM exercitii
+                    WHERE activ = true
+                    ORDER BY data DESC
+                    LIMIT 1
+                )
+                RETURNING data
+            ), opened AS (
+                INSERT INTO exercitii (data, activ)
+                VALUES (:today, true)
+                ON CONFLICT (data) DO NOTHING
+                RETURNING id
+            )
+            SELECT (SELECT data FROM closed) AS closed_data,
+                   EXISTS (SELECT 1 FROM opened) AS opened
+        """), {"now": datetime.now(), "today": today})).one()
         await session.commit()
+        invalidate_raport_cache()
+
+    if row.closed_data is None:
+        print("Auto-close: no active exercitiu, creating one for today")
+    elif row.closed_data >= today:
+        print(f"Auto-close: exercitiu {row.closed_data} is current, closing it")
+    else:
+        print(f"Auto-close: exercitiu {row.closed_data} is from a past day, closing it")
+    if row.opened:
+        print(f"Auto-close: opened new exercitiu for {today}")
+    else:
+        print(f"Auto-close: exercitiu for {today} already exists")
 
     # Șterge toți pinii non-permanenți (comenzi de livrare din ziua anterioară)
     async with AsyncSessionLocal() as session:
@@ -103,13 +130,9 @@ async def save_apeluri_loop():
     """Background task: save daily call data at 23:00."""
     while True:
         try:
-            now = datetime.now()
-            target = datetime.combine(now.date(), time(SAVE_APELURI_HOUR, 0))
-            if now >= target:
-                target += timedelta(days=1)
-            wait_secs = (target - now).total_seconds()
+            target, wait_secs = _next_daily_run(SAVE_APELURI_HOUR)
             print(f"Apeluri save scheduler: next run at {target} (in {wait_secs:.0f}s)")
-            await asyncio.sleep(wait_secs)
+            await _sleep_until(target, wait_secs)
 
             await do_save_apeluri()
         except asyncio.CancelledError:
@@ -125,12 +148,16 @@ async def do_save_apeluri(target_date: date | None = None):
     """Read ami_apeluri for a date and upsert into apeluri_zilnic + apeluri_detalii."""
     target = target_date or date.today()
 
+    # Doar coloanele necesare, ca rânduri Core (fără obiecte ORM per apel)
     async with AsyncSessionLocal() as session:
         rows = (await session.execute(
-            select(AmiApel)
+            select(
+                AmiApel.callid, AmiApel.caller_id, AmiApel.agent, AmiApel.status,
+                AmiApel.ora, AmiApel.hold_time, AmiApel.call_time,
+            )
             .where(AmiApel.data == target)
             .where(AmiApel.status.in_(["COMPLETAT", "ABANDONAT"]))
-        )).scalars().all()
+        )).all()
 
     calls = [
         {
@@ -150,74 +177,50 @@ async def do_save_apeluri(target_date: date | None = None):
         print(f"Apeluri save: no calls found for {target}, skipping")
         return
 
+    ha, hb, cd = stats["hold_answered"], stats["hold_abandoned"], stats["call_duration"]
+    values = dict(
+        total=stats["total"],
+        answered=stats["answered"],
+        abandoned=stats["abandoned"],
+        answer_rate=stats["answer_rate"],
+        abandon_rate=stats["abandon_rate"],
+        asa=stats["asa"],
+        waited_over_30=stats["waited_over_30"],
+        hold_answered_avg=ha["avg"],
+        hold_answered_median=ha["median"],
+        hold_answered_p90=ha["p90"],
+        hold_abandoned_avg=hb["avg"],
+        hold_abandoned_median=hb["median"],
+        hold_abandoned_p90=hb["p90"],
+        call_duration_avg=cd["avg"],
+        call_duration_median=cd["median"],
+        call_duration_p90=cd["p90"],
+        hourly_data=stats["hourly"],
+    )
+
     async with AsyncSessionLocal() as session:
-        # Check if record exists
-        existing = await session.execute(
-            select(ApeluriZilnic).where(ApeluriZilnic.data == target)
+        # Upsert pe data (UNIQUE) — un singur statement, fără SELECT înainte
+        zilnic_id = (await session.execute(
+            pg_insert(ApeluriZilnic)
+            .values(data=target, **values)
+            .on_conflict_do_update(index_elements=["data"], set_=values)
+            .returning(ApeluriZilnic.id)
+        )).scalar_one()
+
+        # Delete old details and re-insert
+        await session.execute(
+            delete(ApeluriDetalii).where(ApeluriDetalii.apeluri_zilnic_id == zilnic_id)
+        )
+
+        # Insert call details via COPY, în aceeași tranzacție (conexiunea asyncpg a sesiunii);
+        # înregistrările sunt generate pe măsură ce sunt trimise
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "apeluri_detalii",
+            columns=["apeluri_zilnic_id", *APELURI_DETALII_COLS],
+            records=((zilnic_id, *(call[c] for c in APELURI_DETALII_COLS)) for call in calls),
         )
-        zilnic = existing.scalar_one_or_none()
-
-        if zilnic:
-            # Update existing
-            zilnic.total = stats["total"]
-            zilnic.answered = stats["answered"]
-            zilnic.abandoned = stats["abandoned"]
-            zilnic.answer_rate = stats["answer_rate"]
-            zilnic.abandon_rate = stats["abandon_rate"]
-            zilnic.asa = stats["asa"]
-            zilnic.waited_over_30 = stats["waited_over_30"]
-            zilnic.hold_answered_avg = stats["hold_answered"]["avg"]
-            zilnic.hold_answered_median = stats["hold_answered"]["median"]
-            zilnic.hold_answered_p90 = stats["hold_answered"]["p90"]
-            zilnic.hold_abandoned_avg = stats["hold_abandoned"]["avg"]
-            zilnic.hold_abandoned_median = stats["hold_abandoned"]["median"]
-            zilnic.hold_abandoned_p90 = stats["hold_abandoned"]["p90"]
-            zilnic.call_duration_avg = stats["call_duration"]["avg"]
-            zilnic.call_duration_median = stats["call_duration"]["median"]
-            zilnic.call_duration_p90 = stats["call_duration"]["p90"]
-            zilnic.hourly_data = stats["hourly"]
-            # Delete old details and re-insert
-            await session.execute(
-                delete(ApeluriDetalii).where(ApeluriDetalii.apeluri_zilnic_id == zilnic.id)
-            )
-        else:
-            # Create new
-            zilnic = ApeluriZilnic(
-                data=target,
-                total=stats["total"],
-                answered=stats["answered"],
-                abandoned=stats["abandoned"],
-                answer_rate=stats["answer_rate"],
-                abandon_rate=stats["abandon_rate"],
-                asa=stats["asa"],
-                waited_over_30=stats["waited_over_30"],
-                hold_answered_avg=stats["hold_answered"]["avg"],
-                hold_answered_median=stats["hold_answered"]["median"],
-                hold_answered_p90=stats["hold_answered"]["p90"],
-                hold_abandoned_avg=stats["hold_abandoned"]["avg"],
-                hold_abandoned_median=stats["hold_abandoned"]["median"],
-                hold_abandoned_p90=stats["hold_abandoned"]["p90"],
-                call_duration_avg=stats["call_duration"]["avg"],
-                call_duration_median=stats["call_duration"]["median"],
-                call_duration_p90=stats["call_duration"]["p90"],
-                hourly_data=stats["hourly"],
-            )
-            session.add(zilnic)
-            await session.flush()  # get zilnic.id
-
-        # Insert call details
-        for call in calls:
-            det = ApeluriDetalii(
-                apeluri_zilnic_id=zilnic.id,
-                callid=call.get("callid", ""),
-                caller_id=call.get("caller_id", ""),
-                agent=call.get("agent", ""),
-                status=call.get("status", ""),
-                ora=call.get("ora", ""),
-                hold_time=call.get("hold_time", 0),
-                call_time=call.get("call_time", 0),
-            )
-            session.add(det)
 
         await session.commit()
         print(f"Apeluri save: saved {target} — {stats.get('total', 0)} calls")
@@ -260,13 +263,9 @@ async def serpapi_account_loop():
     """Background task: fetch SerpAPI account info daily at 08:00."""
     while True:
         try:
-            now = datetime.now()
-            target = datetime.combine(now.date(), time(SERPAPI_ACCOUNT_FETCH_HOUR, 0))
-            if now >= target:
-                target += timedelta(days=1)
-            wait_secs = (target - now).total_seconds()
+            target, wait_secs = _next_daily_run(SERPAPI_ACCOUNT_FETCH_HOUR)
             print(f"SerpAPI account scheduler: next run at {target} (in {wait_secs:.0f}s)")
-            await asyncio.sleep(wait_secs)
+            await _sleep_until(target, wait_secs)
 
             print("SerpAPI account scheduler: fetching account info...")
             result = await do_fetch_serpapi_account()
@@ -398,6 +397,7 @@ async def lifespan(app: FastAPI):
             await task
         except asyncio.CancelledError:
             pass
+    await ai_service.aclose()
 
 
 app = FastAPI(
@@ -428,9 +428,10 @@ app = FastAPI(
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
+    allow_credentials="*" not in settings.CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=settings.CORS_MAX_AGE,
 )
 
 # Include API router
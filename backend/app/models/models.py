@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Numeric, Text, ForeignKey, Date, UniqueConstraint, SmallInteger, Float
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 
@@ -96,7 +96,8 @@ class Nomenclator(Base):
     categorie_id = Column(Integer, ForeignKey("categorii.id", ondelete="SET NULL"))
     grupa_id = Column(Integer, ForeignKey("grupe.id", ondelete="SET NULL"))
     tip_entitate = Column(String(50), default='Altele')
-    embedding = Column(Vector(1024))
+    # Deferred: 1024 floats per rând, citit doar de căutarea vectorială din SQL
+    embedding = deferred(Column(Vector(1024)))
     frecventa_utilizare = Column(Integer, default=0)
     ultima_utilizare = Column(DateTime)
     activ = Column(Boolean, default=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict
 from datetime import datetime, date
 from decimal import Decimal
@@ -42,8 +42,7 @@ class UserResponse(UserBase):
     ultima_autentificare: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -66,8 +65,7 @@ class SettingResponse(SettingBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -96,8 +94,7 @@ class PortofelResponse(PortofelBase):
     activ: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PortofelSoldResponse(PortofelResponse):
@@ -135,8 +132,7 @@ class CategorieResponse(CategorieBase):
     activ: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -166,8 +162,7 @@ class GrupaResponse(GrupaBase):
     categorie_nume: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -202,8 +197,7 @@ class NomenclatorResponse(NomenclatorBase):
     grupa_nume: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AutocompleteResult(BaseModel):
@@ -243,8 +237,7 @@ class ExercitiumResponse(ExercitiumBase):
     inchis_de: Optional[int] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -301,8 +294,7 @@ class CheltuialaResponse(CheltuialaBase):
     exercitiu_data: Optional[date] = None
     exercitiu_activ: Optional[bool] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -345,8 +337,7 @@ class TransferResponse(BaseModel):
     portofel_sursa_nume: Optional[str] = None
     portofel_dest_nume: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -379,8 +370,7 @@ class AlimentareResponse(BaseModel):
 
     portofel_nume: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -468,8 +458,7 @@ class RecomandariApelResponse(BaseModel):
     tip_apeluri: Dict = {}
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -496,8 +485,7 @@ class AgendaContactCampResponse(AgendaContactCampBase):
     id: int
     contact_id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaContactBase(BaseModel):
@@ -530,8 +518,7 @@ class AgendaContactResponse(AgendaContactBase):
     campuri: List[AgendaContactCampResponse] = []
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaInteractiuneCreate(BaseModel):
@@ -549,8 +536,7 @@ class AgendaInteractiuneResponse(BaseModel):
     contact_nume: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaTodoBase(BaseModel):
@@ -583,8 +569,7 @@ class AgendaTodoResponse(AgendaTodoBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaFurnizorBase(BaseModel):
@@ -630,8 +615,7 @@ class AgendaFurnizorListResponse(AgendaFurnizorBase):
     todos_deschise: int = 0
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaFurnizorDetailResponse(AgendaFurnizorBase):
@@ -643,8 +627,7 @@ class AgendaFurnizorDetailResponse(AgendaFurnizorBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaImportErpRequest(BaseModel):
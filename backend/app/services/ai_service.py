@@ -1,13 +1,38 @@
+import asyncio
 import httpx
 import json
-import numpy as np
-from typing import List, Dict, Optional
-from sqlalchemy import select, text
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from heapq import nlargest
+from operator import itemgetter
+from typing import AsyncIterator, List, Dict, Optional
+from sqlalchemy import select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
-from app.models import Nomenclator, Setting
+from app.core.database import AsyncSessionLocal
+from app.core.lookup_cache import get_lookup_map
+from app.models import Categorie, Grupa, Nomenclator, Setting
+
+HNSW_EF_SEARCH = 40  # candidați HNSW per căutare vectorială (recall vs. latență)
+EMBEDDING_BATCH = 32  # texte per apel /api/embed (default; setting ollama_embed_batch_size)
+EMBEDDING_CONCURRENCY = 4  # apeluri /api/embeddings simultane în fallback (setting ollama_embed_concurrency)
+AUTOCOMPLETE_CACHE_TTL = 60.0  # secunde
+AUTOCOMPLETE_CACHE_MAX = 512   # intrări (query normalizat, limit)
+CHAT_CONTEXT_TTL = 15.0  # secunde; golit și la scrieri (cache_invalidation.invalidate_raport_cache)
+AI_SETTINGS_TTL = 60.0  # secunde între recitirile setărilor AI din DB
+QUERY_EMBEDDING_CACHE_MAX = 256  # embeddings de query ținute în memorie (~32 KB fiecare ca listă Python)
+
+# Reîncearcă doar erorile de conexiune (Ollama repornit, keep-alive închis de server);
+# un ReadTimeout nu se repetă.
+_retry_connect = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, min=0.1, max=2),
+    retry=retry_if_exception_type((httpx.ConnectError, httpx.RemoteProtocolError)),
+    reraise=True,
+)
 
 
 class AIService:
@@ -17,12 +42,61 @@ class AIService:
         self._host = settings.OLLAMA_HOST
         self._embedding_model = settings.EMBEDDING_MODEL
         self._chat_model = settings.CHAT_MODEL
+        self._embed_batch = EMBEDDING_BATCH
+        self._embed_concurrency = EMBEDDING_CONCURRENCY
+        self._autocomplete_ai_enabled: Optional[bool] = None  # None = încă necitit
+        self._furnizori: List[tuple[str, str]] = []  # (nume lower, nume) din furnizori_cache
+        self._settings_expires = 0.0
+        self._chat_context: Optional[tuple[float, str]] = None  # (expires, context)
+        self._client: Optional[httpx.AsyncClient] = None
+        # LRU-uri in-process: (query normalizat, limit) -> (expires, rezultate); (model, text) -> embedding
+        self._autocomplete_cache: OrderedDict[tuple, tuple[float, List[Dict]]] = OrderedDict()
+        self._embedding_cache: OrderedDict[tuple, List[float]] = OrderedDict()
+
+    def _http(self) -> httpx.AsyncClient:
+        """Client HTTP comun pentru Ollama (keep-alive), creat la primul apel din event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=2.0),
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=30.0),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Închide clientul HTTP (la shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
+    def cached_autocomplete(self, query: str, limit: int) -> Optional[List[Dict]]:
+        """Rezultatul autocomplete cache-uit pentru query (None dacă lipsește sau a expirat)"""
+        key = (query.strip().lower(), limit)
+        cached = self._autocomplete_cache.get(key)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del self._autocomplete_cache[key]
+            return None
+        self._autocomplete_cache.move_to_end(key)
+        return cached[1]
+
+    def invalidate_autocomplete_cache(self):
+        """Golește cache-ul autocomplete (apelat după scrieri în nomenclator)"""
+        self._autocomplete_cache.clear()
+
+    def invalidate_settings(self):
+        """Forțează recitirea setărilor AI la următorul update_settings()"""
+        self._settings_expires = 0.0
+
     async def update_settings(self, db: AsyncSession):
-        """Update AI settings from database"""
+        """Update AI settings from database (cel mult o dată la AI_SETTINGS_TTL)"""
+        if self._settings_expires > time.monotonic():
+            return
         result = await db.execute(
             select(Setting).where(Setting.cheie.in_([
-                'ollama_host', 'ollama_embedding_model', 'ollama_chat_model'
+                'ollama_host', 'ollama_embedding_model', 'ollama_chat_model',
+                'ollama_embed_batch_size', 'ollama_embed_concurrency',
+                'ai_autocomplete_enabled', 'furnizori_cache'
             ]))
         )
         settings_db = {s.cheie: s.valoare for s in result.scalars().all()}
@@ -33,30 +107,45 @@ class AIService:
             self._embedding_model = settings_db['ollama_embedding_model']
         if 'ollama_chat_model' in settings_db:
             self._chat_model = settings_db['ollama_chat_model']
+        try:
+            self._embed_batch = max(1, int(settings_db.get('ollama_embed_batch_size') or EMBEDDING_BATCH))
+        except ValueError:
+            self._embed_batch = EMBEDDING_BATCH
+        try:
+            self._embed_concurrency = max(1, int(settings_db.get('ollama_embed_concurrency') or EMBEDDING_CONCURRENCY))
+        except ValueError:
+            self._embed_concurrency = EMBEDDING_CONCURRENCY
+        self._autocomplete_ai_enabled = settings_db.get('ai_autocomplete_enabled') == 'true'
+        try:
+            vendor_names = json.loads(settings_db.get('furnizori_cache') or '[]')
+            self._furnizori = [(name.lower(), name) for name in vendor_names if name]
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Furnizori cache parse error: {e}")
+            self._furnizori = []
+        self._settings_expires = time.monotonic() + AI_SETTINGS_TTL
     
     async def test_connection(self) -> Dict:
         """Test Ollama connection and return status"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self._host}/api/tags")
-                if response.status_code == 200:
-                    data = response.json()
-                    models = [m.get("name", "") for m in data.get("models", [])]
-                    return {
-                        "status": "connected",
-                        "host": self._host,
-                        "models": models,
-                        "embedding_model": self._embedding_model,
-                        "chat_model": self._chat_model,
-                        "embedding_available": any(self._embedding_model in m for m in models),
-                        "chat_available": any(self._chat_model in m for m in models),
-                    }
-                else:
-                    return {
-                        "status": "disconnected",
-                        "host": self._host,
-                        "error": f"HTTP {response.status_code}",
-                    }
+            response = await self._http().get(f"{self._host}/api/tags", timeout=2.0)
+            if response.status_code == 200:
+                data = response.json()
+                models = [m.get("name", "") for m in data.get("models", [])]
+                return {
+                    "status": "connected",
+                    "host": self._host,
+                    "models": models,
+                    "embedding_model": self._embedding_model,
+                    "chat_model": self._chat_model,
+                    "embedding_available": any(self._embedding_model in m for m in models),
+                    "chat_available": any(self._chat_model in m for m in models),
+                }
+            else:
+                return {
+                    "status": "disconnected",
+                    "host": self._host,
+                    "error": f"HTTP {response.status_code}",
+                }
         except Exception as e:
             return {
                 "status": "disconnected",
@@ -64,27 +153,75 @@ class AIService:
                 "error": str(e),
             }
     
+    @_retry_connect
+    async def _post_embedding(self, text: str) -> httpx.Response:
+        return await self._http().post(
+            f"{self._host}/api/embeddings",
+            json={
+                "model": self._embedding_model,
+                "prompt": text
+            }
+        )
+
+    @_retry_connect
+    async def _post_embed_batch(self, texts: List[str]) -> httpx.Response:
+        return await self._http().post(
+            f"{self._host}/api/embed",
+            json={
+                "model": self._embedding_model,
+                "input": texts
+            },
+            timeout=120.0
+        )
+
     async def generate_embedding_async(self, text: str) -> List[float]:
         """Generează embedding vector pentru text (async)"""
+        key = (self._embedding_model, text)
+        cached = self._embedding_cache.get(key)
+        if cached is not None:
+            self._embedding_cache.move_to_end(key)
+            return cached
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self._host}/api/embeddings",
-                    json={
-                        "model": self._embedding_model,
-                        "prompt": text
-                    }
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    embedding = data.get('embedding', [])
-                    if embedding:
-                        return embedding
+            response = await self._post_embedding(text)
+            if response.status_code == 200:
+                data = response.json()
+                embedding = data.get('embedding', [])
+                if embedding:
+                    self._embedding_cache[key] = embedding
+                    if len(self._embedding_cache) > QUERY_EMBEDDING_CACHE_MAX:
+                        self._embedding_cache.popitem(last=False)
+                    return embedding
         except Exception as e:
             print(f"Error generating embedding: {e}")
 
         return []  # Empty = no embedding generated
-    
+
+    async def generate_embeddings_batch_async(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings pentru mai multe texte într-un singur apel Ollama (/api/embed).
+
+        Pe Ollama vechi (fără /api/embed) cade pe câte un apel per text, în paralel limitat.
+        Un embedding gol = nu s-a putut genera pentru textul respectiv.
+        """
+        if not texts:
+            return []
+        try:
+            response = await self._post_embed_batch(texts)
+            if response.status_code == 200:
+                embeddings = response.json().get('embeddings', [])
+                if len(embeddings) == len(texts):
+                    return embeddings
+        except Exception as e:
+            print(f"Error generating batch embeddings: {e}")
+
+        # Fallback: câte un apel per text, maxim _embed_concurrency simultan
+        sem = asyncio.Semaphore(self._embed_concurrency)
+
+        async def one(t: str) -> List[float]:
+            async with sem:
+                return await self.generate_embedding_async(t)
+
+        return list(await asyncio.gather(*(one(t) for t in texts)))
+
     async def autocomplete_ai(
         self,
         query: str,
@@ -96,7 +233,11 @@ class AIService:
         1. Trigram similarity (PostgreSQL pg_trgm) - RAPID
         2. Vector similarity (pgvector + embeddings) - PRECIS (dacă embeddings există)
         """
-        results = []
+        # Setările AI + furnizori_cache vin dintr-un singur query, reîmprospătat la AI_SETTINGS_TTL
+        await self.update_settings(db)
+
+        # Un singur rezultat per denumire (case-insensitive), în ordinea metodelor
+        results: Dict[str, Dict] = {}
         
         # Method 1: Trigram search (always works)
         sql = text("""
@@ -106,7 +247,7 @@ class AIService:
         rows = result.fetchall()
 
         for row in rows:
-            results.append({
+            results.setdefault(row.denumire.lower(), {
                 "id": row.id,
                 "denumire": row.denumire,
                 "categorie_id": row.categorie_id,
@@ -118,19 +259,22 @@ class AIService:
                 "source": "trigram"
             })
 
+        # Numele categoriilor/grupelor vin din lookup cache, nu din JOIN-uri la fiecare tastă
+        categorii = await get_lookup_map(db, Categorie)
+        grupe = await get_lookup_map(db, Grupa)
+
+        def nume(lookup: dict, id_: Optional[int]) -> Optional[str]:
+            row = lookup.get(id_)
+            return row.nume if row else None
+
         # Method 1b: Search in cheltuieli.denumire_custom (historical custom names)
-        seen_denumiri = {r["denumire"].lower() for r in results}
         sql_custom = text("""
             SELECT DISTINCT ON (LOWER(ch.denumire_custom))
                 ch.denumire_custom as denumire,
                 ch.categorie_id,
-                c.nume as categorie_nume,
                 ch.grupa_id,
-                g.nume as grupa_nume,
                 similarity(ch.denumire_custom, :query) as sim
             FROM cheltuieli ch
-            LEFT JOIN categorii c ON ch.categorie_id = c.id
-            LEFT JOIN grupe g ON ch.grupa_id = g.id
             WHERE ch.denumire_custom IS NOT NULL
               AND ch.denumire_custom <> ''
               AND ch.activ = true
@@ -146,111 +290,129 @@ class AIService:
         rows_custom = result_custom.fetchall()
 
         for row in rows_custom:
-            if row.denumire.lower() not in seen_denumiri:
-                results.append({
+            if row.denumire.lower() not in results:
+                results[row.denumire.lower()] = {
                     "id": None,
                     "denumire": row.denumire,
                     "categorie_id": row.categorie_id,
-                    "categorie_nume": row.categorie_nume,
+                    "categorie_nume": nume(categorii, row.categorie_id),
                     "grupa_id": row.grupa_id,
-                    "grupa_nume": row.grupa_nume,
+                    "grupa_nume": nume(grupe, row.grupa_id),
                     "tip_entitate": None,
                     "similarity": float(row.sim) if row.sim else 0.0,
                     "source": "history"
-                })
+                }
 
-        # Method 1c: Search in furnizori cache (ERP vendors)
-        try:
-            furnizori_result = await db.execute(
-                select(Setting).where(Setting.cheie == 'furnizori_cache')
-            )
-            furnizori_setting = furnizori_result.scalar_one_or_none()
-            if furnizori_setting and furnizori_setting.valoare:
-                vendor_names = json.loads(furnizori_setting.valoare)
-                q_lower = query.lower()
-                for name in vendor_names:
-                    if name and q_lower in name.lower() and name.lower() not in seen_denumiri:
-                        results.append({
-                            "id": None,
-                            "denumire": name,
-                            "categorie_id": None,
-                            "categorie_nume": None,
-                            "grupa_id": None,
-                            "grupa_nume": None,
-                            "tip_entitate": "furnizor",
-                            "similarity": 0.4,
-                            "source": "furnizor"
-                        })
-                        seen_denumiri.add(name.lower())
-        except Exception as e:
-            print(f"Furnizori cache search error: {e}")
+        # Method 1c: Search in furnizori cache (ERP vendors; încărcat de update_settings)
+        q_lower = query.lower()
+        for name_lower, name in self._furnizori:
+            if q_lower in name_lower and name_lower not in results:
+                results[name_lower] = {
+                    "id": None,
+                    "denumire": name,
+                    "categorie_id": None,
+                    "categorie_nume": None,
+                    "grupa_id": None,
+                    "grupa_nume": None,
+                    "tip_entitate": "furnizor",
+                    "similarity": 0.4,
+                    "source": "furnizor"
+                }
 
         # Method 2: Vector search (if enabled and no good results)
         if len(results) < 3:
             try:
-                # Check if AI is enabled
-                setting = await db.execute(
-                    select(Setting).where(Setting.cheie == 'ai_autocomplete_enabled')
-                )
-                ai_enabled = setting.scalar_one_or_none()
-                
-                if ai_enabled and ai_enabled.valoare == 'true':
+                # Check if AI is enabled (citit de update_settings)
+                if self._autocomplete_ai_enabled:
                     query_embedding = await self.generate_embedding_async(query)
                     
-                    # Convert embedding to string format for PostgreSQL
-                    embedding_str = str(query_embedding)
-                    
-                    sql_vector = text(f"""
-                        SELECT 
-                            n.id,
-                            n.denumire,
-                            n.categorie_id,
-                            c.nume as categorie_nume,
-                            n.grupa_id,
-                            g.nume as grupa_nume,
-                            n.tip_entitate,
-                            1 - (n.embedding <=> '{embedding_str}'::vector) as similarity
-                        FROM nomenclator n
-                        LEFT JOIN categorii c ON n.categorie_id = c.id
-                        LEFT JOIN grupe g ON n.grupa_id = g.id
-                        WHERE n.activ = true
-                          AND n.embedding IS NOT NULL
-                        ORDER BY n.embedding <=> '{embedding_str}'::vector
-                        LIMIT {limit}
-                    """)
-                    
-                    result = await db.execute(sql_vector)
+                    if query_embedding:
+                        # Candidate list size for the HNSW index (idx_nomenclator_embedding_halfvec);
+                        # HNSW returns at most ef_search rows, so it must cover limit (up to 50)
+                        ef_search = max(HNSW_EF_SEARCH, int(limit))
+                        await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+
+                        sql_vector = text("""
+                            SELECT
+                                n.id,
+                                n.denumire,
+                                n.categorie_id,
+                                n.grupa_id,
+                                n.tip_entitate,
+                                n.embedding::halfvec(1024) <=> CAST(:embedding AS vector)::halfvec(1024) as distance
+                            FROM nomenclator n
+                            WHERE n.activ = true
+                              AND n.embedding IS NOT NULL
+                            ORDER BY distance
+                            LIMIT :limit
+                        """)
+
+                        result = await db.execute(
+                            sql_vector, {"embedding": query_embedding, "limit": limit}
+                        )
+                        for row in result.fetchall():
+                            similarity = 1 - float(row.distance) if row.distance is not None else 0.0
+                            existing = results.get(row.denumire.lower())
+                            if existing is not None:
+                                # Deja găsit textual: păstrează scorul cel mai bun
+                                existing["similarity"] = max(existing["similarity"], similarity)
+                                continue
+                            results[row.denumire.lower()] = {
+                                "id": row.id,
+                                "denumire": row.denumire,
+                                "categorie_id": row.categorie_id,
+                                "categorie_nume": nume(categorii, row.categorie_id),
+                                "grupa_id": row.grupa_id,
+                                "grupa_nume": nume(grupe, row.grupa_id),
+                                "tip_entitate": row.tip_entitate,
+                                "similarity": similarity,
+                                "source": "vector"
+                            }
             except Exception as e:
                 print(f"Vector search error: {e}")
         
-        # Sort by similarity
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        return results[:limit]
+        # Top `limit` by similarity (same order as a stable sort, without sorting everything)
+        ranked = nlargest(limit, results.values(), key=itemgetter("similarity"))
+
+        self._autocomplete_cache[(query.strip().lower(), limit)] = (
+            time.monotonic() + AUTOCOMPLETE_CACHE_TTL, ranked
+        )
+        if len(self._autocomplete_cache) > AUTOCOMPLETE_CACHE_MAX:
+            self._autocomplete_cache.popitem(last=False)
+        return ranked
     
     async def generate_embeddings_for_nomenclator(self, db: AsyncSession, force: bool = False) -> Dict:
         """Generate embeddings for all nomenclator items without embeddings (or all if force=True)"""
-        query = select(Nomenclator).where(Nomenclator.activ == True)
+        query = select(Nomenclator.id, Nomenclator.denumire).where(Nomenclator.activ == True)
         if not force:
             query = query.where(Nomenclator.embedding == None)
         result = await db.execute(query)
-        items = result.scalars().all()
+        items = result.all()
 
         generated = 0
         errors = 0
 
-        for item in items:
+        batch_size = self._embed_batch
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
             try:
-                embedding = await self.generate_embedding_async(item.denumire)
-                if embedding:
-                    item.embedding = embedding
-                    generated += 1
-                else:
-                    errors += 1
+                embeddings = await self.generate_embeddings_batch_async([item.denumire for item in batch])
             except Exception as e:
-                print(f"Error generating embedding for {item.denumire}: {e}")
-                errors += 1
+                print(f"Error generating embeddings for batch {i}: {e}")
+                errors += len(batch)
+                continue
+            rows = [
+                {"id": item.id, "embedding": embedding}
+                for item, embedding in zip(batch, embeddings) if embedding
+            ]
+            errors += len(batch) - len(rows)
+            if rows:
+                # UPDATE by primary key, executemany; commit per batch so a failure keeps earlier batches
+                await db.execute(update(Nomenclator), rows)
+                await db.commit()
+                generated += len(rows)
 
-        await db.commit()
+        self.invalidate_autocomplete_cache()
 
         return {
             "total": len(items),
@@ -258,13 +420,12 @@ class AIService:
             "errors": errors
         }
     
-    async def chat(self, message: str, db: AsyncSession, user_id: int) -> str:
-        """Chat with AI BigBoss"""
-        try:
-            # Build context from recent data
-            context = await self._build_chat_context(db)
-            
-            system_prompt = f"""Ești asistentul AI pentru aplicația de gestiune cheltuieli a unui restaurant.
+    async def _chat_request(self, message: str, stream: bool) -> Dict:
+        """Corpul cererii /api/chat: system prompt cu contextul curent + mesajul utilizatorului"""
+        # Build context from recent data
+        context = await self._build_chat_context()
+
+        system_prompt = f"""Ești asistentul AI pentru aplicația de gestiune cheltuieli a unui restaurant.
 Răspunde în limba română, concis și la obiect.
 
 Context actual:
@@ -276,153 +437,199 @@ Poți răspunde la întrebări despre:
 - Statistici și rapoarte
 - Furnizori și categorii
 """
+        return {
+            "model": self._chat_model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": message}
+            ],
+            "stream": stream
+        }
+
+    @_retry_connect
+    async def _post_chat(self, payload: Dict) -> httpx.Response:
+        return await self._http().post(f"{self._host}/api/chat", json=payload, timeout=60.0)
+
+    @_retry_connect
+    async def _open_chat_stream(self, payload: Dict) -> httpx.Response:
+        # Reîncearcă doar deschiderea (până la headere), niciodată după primul token
+        client = self._http()
+        request = client.build_request("POST", f"{self._host}/api/chat", json=payload, timeout=60.0)
+        return await client.send(request, stream=True)
+
+    async def chat(self, message: str, user_id: int) -> str:
+        """Chat with AI BigBoss"""
+        try:
+            response = await self._post_chat(await self._chat_request(message, stream=False))
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self._host}/api/chat",
-                    json={
-                        "model": self._chat_model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": message}
-                        ],
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('message', {}).get('content', 'Nu am putut genera un răspuns.')
-                else:
-                    return f"Eroare Ollama: {response.status_code}"
+            if response.status_code == 200:
+                data = response.json()
+                return data.get('message', {}).get('content', 'Nu am putut genera un răspuns.')
+            else:
+                return f"Eroare Ollama: {response.status_code}"
             
         except Exception as e:
             return f"Eroare AI: {str(e)}"
+
+    async def chat_stream(self, message: str, user_id: int) -> AsyncIterator[str]:
+        """Chat with AI BigBoss, token cu token (Ollama stream: câte un JSON pe linie)"""
+        try:
+            payload = await self._chat_request(message, stream=True)
+            response = await self._open_chat_stream(payload)
+            try:
+                if response.status_code != 200:
+                    yield f"Eroare Ollama: {response.status_code}"
+                    return
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    content = chunk.get('message', {}).get('content')
+                    if content:
+                        yield content
+                    if chunk.get('done'):
+                        break
+            finally:
+                await response.aclose()
+        except Exception as e:
+            yield f"Eroare AI: {str(e)}"
     
-    async def _build_chat_context(self, db: AsyncSession) -> str:
-        """Build context for AI chat from current data"""
-        context_parts = []
+    def invalidate_chat_context(self):
+        """Golește contextul chat cache-uit (datele zilei s-au schimbat)"""
+        self._chat_context = None
+
+    async def _build_chat_context(self) -> str:
+        """Build context for AI chat from current data (cache-uit CHAT_CONTEXT_TTL secunde)"""
+        cached = self._chat_context
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
 
-        # Get current exercitiu stats
+        # Ziua curentă, categorii, ultimele cheltuieli, alimentări, transferuri și neplătit
+        # vin într-un singur query (_ctx_zi); soldurile din view rulează în paralel, pe
+        # sesiunea lor (AsyncSession nu suportă query-uri concurente).
+        async def isolated(section):
+            async with AsyncSessionLocal() as session:
+                return await section(session)
+
+        zi, solduri = await asyncio.gather(isolated(self._ctx_zi), isolated(self._ctx_solduri))
+        context = "\n".join(part for part in (zi[0], solduri, *zi[1:]) if part)
+        self._chat_context = (time.monotonic() + CHAT_CONTEXT_TTL, context)
+        return context
+
+    @staticmethod
+    async def _ctx_zi(db: AsyncSession) -> List[Optional[str]]:
         sql = text("""
-            SELECT
-                e.data,
-                COUNT(ch.id) as nr_cheltuieli,
-                COALESCE(SUM(ch.suma), 0) as total
-            FROM exercitii e
-            LEFT JOIN cheltuieli ch ON ch.exercitiu_id = e.id AND ch.activ = true
-            WHERE e.activ = true
-            GROUP BY e.id, e.data
-            LIMIT 1
+            WITH ex AS (
+                SELECT id, data FROM exercitii WHERE activ = true
+            ),
+            ch_azi AS (
+                SELECT ch.*
+                FROM cheltuieli ch
+                JOIN ex ON ch.exercitiu_id = ex.id
+                WHERE ch.activ = true
+            )
+            SELECT json_build_object(
+                'zi', (
+                    SELECT row_to_json(z) FROM (
+                        SELECT
+                            ex.data,
+                            COUNT(ch_azi.id) as nr_cheltuieli,
+                            COALESCE(SUM(ch_azi.suma), 0) as total
+                        FROM ex
+                        LEFT JOIN ch_azi ON ch_azi.exercitiu_id = ex.id
+                        GROUP BY ex.id, ex.data
+                        LIMIT 1
+                    ) z
+                ),
+                'categorii', (
+                    SELECT json_agg(c ORDER BY c.total DESC) FROM (
+                        SELECT
+                            COALESCE(cat.nume, 'Necategorizate') as categorie,
+                            COUNT(ch_azi.id) as nr,
+                            COALESCE(SUM(ch_azi.suma), 0) as total
+                        FROM ch_azi
+                        LEFT JOIN categorii cat ON ch_azi.categorie_id = cat.id
+                        GROUP BY cat.nume
+                    ) c
+                ),
+                'recente', (
+                    SELECT json_agg(r ORDER BY r.created_at DESC) FROM (
+                        SELECT
+                            COALESCE(n.denumire, ch_azi.denumire_custom, 'N/A') as denumire,
+                            ch_azi.suma,
+                            ch_azi.sens,
+                            ch_azi.moneda,
+                            p.nume as portofel,
+                            ch_azi.created_at
+                        FROM ch_azi
+                        LEFT JOIN nomenclator n ON ch_azi.nomenclator_id = n.id
+                        LEFT JOIN portofele p ON ch_azi.portofel_id = p.id
+                        ORDER BY ch_azi.created_at DESC
+                        LIMIT 10
+                    ) r
+                ),
+                'alimentari', (
+                    SELECT json_agg(a ORDER BY a.created_at DESC) FROM (
+                        SELECT p.nume as portofel, al.suma, al.moneda, al.created_at
+                        FROM alimentari al
+                        JOIN portofele p ON al.portofel_id = p.id
+                        JOIN ex ON al.exercitiu_id = ex.id
+                    ) a
+                ),
+                'transferuri', (
+                    SELECT json_agg(t ORDER BY t.created_at DESC) FROM (
+                        SELECT ps.nume as sursa, pd.nume as dest, tr.suma, tr.moneda, tr.created_at
+                        FROM transferuri tr
+                        JOIN portofele ps ON tr.portofel_sursa_id = ps.id
+                        JOIN portofele pd ON tr.portofel_dest_id = pd.id
+                        JOIN ex ON tr.exercitiu_id = ex.id
+                    ) t
+                ),
+                'neplatit', (
+                    SELECT COALESCE(SUM(suma), 0) FROM ch_azi WHERE neplatit = true
+                )
+            )::text
         """)
-        result = await db.execute(sql)
-        row = result.fetchone()
-        if row:
-            context_parts.append(f"Ziua curentă: {row.data}, {row.nr_cheltuieli} cheltuieli, total: {row.total} lei")
+        # parse_float=Decimal: sumele se afișează exact ca din NUMERIC (ex. 12.50)
+        ctx = json.loads(await db.scalar(sql), parse_float=Decimal)
+        parts: List[Optional[str]] = []
+
+        zi = ctx["zi"]
+        parts.append(
+            f"Ziua curentă: {zi['data']}, {zi['nr_cheltuieli']} cheltuieli, total: {zi['total']} lei"
+            if zi else None
+        )
+        if ctx["categorii"]:
+            cats = [f"{r['categorie']}: {r['nr']} tranzacții, {r['total']} lei" for r in ctx["categorii"]]
+            parts.append(f"Pe categorii azi: {'; '.join(cats)}")
+        if ctx["recente"]:
+            items = [
+                f"{r['denumire']}: {r['suma']} {r['moneda']} ({r['sens']}, {r['portofel']})"
+                for r in ctx["recente"]
+            ]
+            parts.append(f"Ultimele cheltuieli: {'; '.join(items)}")
+        if ctx["alimentari"]:
+            alims = [f"{r['portofel']}: +{r['suma']} {r['moneda']}" for r in ctx["alimentari"]]
+            parts.append(f"Alimentări azi: {'; '.join(alims)}")
+        if ctx["transferuri"]:
+            transfers = [f"{r['sursa']} → {r['dest']}: {r['suma']} {r['moneda']}" for r in ctx["transferuri"]]
+            parts.append(f"Transferuri azi: {'; '.join(transfers)}")
+        if ctx["neplatit"] > 0:
+            parts.append(f"Total marfă neplătită azi: {ctx['neplatit']} lei")
+        return parts
 
+    @staticmethod
+    async def _ctx_solduri(db: AsyncSession) -> Optional[str]:
         # Get portofele solduri
         try:
             sql = text("SELECT portofel, sold_zi_curenta FROM v_solduri_portofele")
             result = await db.execute(sql)
             solduri = [f"{r.portofel}: {r.sold_zi_curenta} lei" for r in result.fetchall()]
             if solduri:
-                context_parts.append(f"Solduri portofele: {', '.join(solduri)}")
+                return f"Solduri portofele: {', '.join(solduri)}"
         except Exception:
             pass
-
-        # Get cheltuieli by category for today
-        sql = text("""
-            SELECT
-                COALESCE(c.nume, 'Necategorizate') as categorie,
-                COUNT(ch.id) as nr,
-                COALESCE(SUM(ch.suma), 0) as total
-            FROM cheltuieli ch
-            LEFT JOIN categorii c ON ch.categorie_id = c.id
-            JOIN exercitii e ON ch.exercitiu_id = e.id
-            WHERE e.activ = true AND ch.activ = true
-            GROUP BY c.nume
-            ORDER BY total DESC
-        """)
-        result = await db.execute(sql)
-        rows = result.fetchall()
-        if rows:
-            cats = [f"{r.categorie}: {r.nr} tranzacții, {r.total} lei" for r in rows]
-            context_parts.append(f"Pe categorii azi: {'; '.join(cats)}")
-
-        # Get recent cheltuieli (last 10)
-        sql = text("""
-            SELECT
-                COALESCE(n.denumire, ch.denumire_custom, 'N/A') as denumire,
-                ch.suma,
-                ch.sens,
-                ch.moneda,
-                p.nume as portofel
-            FROM cheltuieli ch
-            LEFT JOIN nomenclator n ON ch.nomenclator_id = n.id
-            LEFT JOIN portofele p ON ch.portofel_id = p.id
-            JOIN exercitii e ON ch.exercitiu_id = e.id
-            WHERE e.activ = true AND ch.activ = true
-            ORDER BY ch.created_at DESC
-            LIMIT 10
-        """)
-        result = await db.execute(sql)
-        rows = result.fetchall()
-        if rows:
-            items = [f"{r.denumire}: {r.suma} {r.moneda} ({r.sens}, {r.portofel})" for r in rows]
-            context_parts.append(f"Ultimele cheltuieli: {'; '.join(items)}")
-
-        # Get alimentari today
-        sql = text("""
-            SELECT
-                p.nume as portofel,
-                a.suma,
-                a.moneda
-            FROM alimentari a
-            JOIN portofele p ON a.portofel_id = p.id
-            JOIN exercitii e ON a.exercitiu_id = e.id
-            WHERE e.activ = true
-            ORDER BY a.created_at DESC
-        """)
-        result = await db.execute(sql)
-        rows = result.fetchall()
-        if rows:
-            alims = [f"{r.portofel}: +{r.suma} {r.moneda}" for r in rows]
-            context_parts.append(f"Alimentări azi: {'; '.join(alims)}")
-
-        # Get transferuri today
-        sql = text("""
-            SELECT
-                ps.nume as sursa,
-                pd.nume as dest,
-                t.suma,
-                t.moneda
-            FROM transferuri t
-            JOIN portofele ps ON t.portofel_sursa_id = ps.id
-            JOIN portofele pd ON t.portofel_dest_id = pd.id
-            JOIN exercitii e ON t.exercitiu_id = e.id
-            WHERE e.activ = true
-            ORDER BY t.created_at DESC
-        """)
-        result = await db.execute(sql)
-        rows = result.fetchall()
-        if rows:
-            transfers = [f"{r.sursa} → {r.dest}: {r.suma} {r.moneda}" for r in rows]
-            context_parts.append(f"Transferuri azi: {'; '.join(transfers)}")
-
-        # Get total neplatit
-        sql = text("""
-            SELECT COALESCE(SUM(ch.suma), 0) as total_neplatit
-            FROM cheltuieli ch
-            JOIN exercitii e ON ch.exercitiu_id = e.id
-            WHERE e.activ = true AND ch.activ = true AND ch.neplatit = true
-        """)
-        result = await db.execute(sql)
-        row = result.fetchone()
-        if row and row.total_neplatit > 0:
-            context_parts.append(f"Total marfă neplătită azi: {row.total_neplatit} lei")
-
-        return "\n".join(context_parts)
-
+        return None
 
 # Singleton instance
 ai_service = AIService()
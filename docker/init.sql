@@ -170,7 +170,11 @@ CREATE TABLE nomenclator (
 
 -- Indexes pentru search rapid
 CREATE INDEX idx_nomenclator_denumire_trgm ON nomenclator USING gin (denumire gin_trgm_ops);
-CREATE INDEX idx_nomenclator_embedding ON nomenclator USING ivfflat (embedding vector_cosine_ops) WITH (lists = 50);
+-- HNSW pe embedding::halfvec(1024) (aceeași expresie ca ORDER BY din autocomplete_ai);
+-- fără antrenare, deci corect și creat pe tabelul gol
+CREATE INDEX idx_nomenclator_embedding_halfvec ON nomenclator USING hnsw ((embedding::halfvec(1024)) halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE activ = true AND embedding IS NOT NULL;
 CREATE INDEX idx_nomenclator_categorie ON nomenclator(categorie_id) WHERE activ = true;
 CREATE INDEX idx_nomenclator_activ ON nomenclator(activ);
 
@@ -216,7 +220,7 @@ CREATE TABLE exercitii (
 );
 
 CREATE INDEX idx_exercitii_data ON exercitii(data DESC);
-CREATE INDEX idx_exercitii_activ ON exercitii(activ) WHERE activ = true;
+CREATE INDEX idx_exercitii_activ_data ON exercitii(data DESC) WHERE activ = true;
 
 -- ============================================
 -- 8. CHELTUIELI (Tranzacții principale)
@@ -261,6 +265,15 @@ CREATE INDEX idx_cheltuieli_sens ON cheltuieli(sens);
 CREATE INDEX idx_cheltuieli_neplatit ON cheltuieli(neplatit) WHERE neplatit = true;
 CREATE INDEX idx_cheltuieli_verificat ON cheltuieli(verificat);
 
+-- Raport zilnic (_fetch_raport_cheltuieli, _fetch_totaluri)
+CREATE INDEX idx_cheltuieli_raport ON cheltuieli(exercitiu_id, categorie_id, moneda)
+    WHERE activ = true AND sens = 'Cheltuiala';
+-- Cheltuieli/încasări plătite care intră în solduri (backfill sold_portofel_moneda)
+CREATE INDEX idx_cheltuieli_sold ON cheltuieli(exercitiu_id, portofel_id, moneda) INCLUDE (suma, categorie_id, sens)
+    WHERE activ = true AND neplatit = false AND sens IN ('Cheltuiala', 'Incasare');
+-- Listare pe exercițiu (GET /cheltuieli): filtru + ORDER BY created_at DESC din index
+CREATE INDEX idx_cheltuieli_ex_activ_created ON cheltuieli(exercitiu_id, created_at DESC) WHERE activ = true;
+
 -- ============================================
 -- 9. TRANSFERURI (între portofele)
 -- ============================================
@@ -285,7 +298,7 @@ CREATE TABLE transferuri (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_transferuri_exercitiu ON transferuri(exercitiu_id);
+CREATE INDEX idx_transferuri_ex_created ON transferuri(exercitiu_id, created_at DESC);
 
 -- ============================================
 -- 10. ALIMENTARI (sold inițial portofele)
@@ -302,7 +315,7 @@ CREATE TABLE alimentari (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_alimentari_exercitiu ON alimentari(exercitiu_id);
+CREATE INDEX idx_alimentari_ex_created ON alimentari(exercitiu_id, created_at DESC);
 
 -- ============================================
 -- 11. CHAT HISTORY (pentru BigBoss AI)
@@ -344,7 +357,7 @@ CREATE TABLE apeluri_zilnic (
     call_duration_avg INTEGER DEFAULT 0,
     call_duration_median INTEGER DEFAULT 0,
     call_duration_p90 INTEGER DEFAULT 0,
-    hourly_data JSONB DEFAULT '[]',
+    hourly_data JSONB COMPRESSION lz4 DEFAULT '[]',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -377,10 +390,10 @@ CREATE TABLE recomandari_apeluri (
     data DATE NOT NULL,
     ai_model VARCHAR(20) NOT NULL DEFAULT 'Claude' CHECK (ai_model IN ('Claude', 'Ollama')),
     total_conversatii INTEGER DEFAULT 0,
-    conversations JSONB DEFAULT '[]',
-    top_recomandari JSONB DEFAULT '[]',
-    top_lucruri_bune JSONB DEFAULT '[]',
-    tip_apeluri JSONB DEFAULT '{}',
+    conversations JSONB COMPRESSION lz4 DEFAULT '[]',
+    top_recomandari JSONB COMPRESSION lz4 DEFAULT '[]',
+    top_lucruri_bune JSONB COMPRESSION lz4 DEFAULT '[]',
+    tip_apeluri JSONB COMPRESSION lz4 DEFAULT '{}',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT unique_data_ai_model UNIQUE (data, ai_model)
 );
@@ -575,14 +588,156 @@ LEFT JOIN users u ON ch.operator_id = u.id
 WHERE ch.activ = true
 ORDER BY cat.ordine, g.ordine, ch.created_at DESC;
 
--- View: Solduri portofele pentru exercițiu activ
+-- Tabel: Totaluri zilnice per portofel/monedă/tip (întreținut prin triggere)
+CREATE TABLE IF NOT EXISTS sold_portofel_moneda (
+    exercitiu_id INTEGER NOT NULL REFERENCES exercitii(id) ON DELETE CASCADE,
+    portofel_id  INTEGER NOT NULL REFERENCES portofele(id) ON DELETE CASCADE,
+    moneda       VARCHAR(3) NOT NULL,
+    tip          VARCHAR(20) NOT NULL,  -- alimentari, Cheltuiala, Incasare, transfer_in, transfer_out
+    suma         NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (exercitiu_id, portofel_id, moneda, tip)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sold_portofel_moneda_portofel ON sold_portofel_moneda(portofel_id);
+
+CREATE OR REPLACE FUNCTION sold_moneda_delta(
+    p_exercitiu_id INTEGER,
+    p_portofel_id INTEGER,
+    p_moneda VARCHAR,
+    p_tip VARCHAR,
+    p_delta NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_exercitiu_id IS NULL OR p_portofel_id IS NULL OR COALESCE(p_delta, 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO sold_portofel_moneda (exercitiu_id, portofel_id, moneda, tip, suma)
+    SELECT p_exercitiu_id, p_portofel_id, COALESCE(p_moneda, 'RON'), p_tip, p_delta
+    WHERE EXISTS (SELECT 1 FROM exercitii WHERE id = p_exercitiu_id)
+    ON CONFLICT (exercitiu_id, portofel_id, moneda, tip) DO UPDATE
+        SET suma = sold_portofel_moneda.suma + EXCLUDED.suma;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Paid, active, and the categorie (if any) doesn't have afecteaza_sold = false; a NULL
+-- flag or a deleted categorie counts, like get_sold_portofel
+CREATE OR REPLACE FUNCTION sold_moneda_conteaza(ch cheltuieli)
+RETURNS BOOLEAN AS $$
+    SELECT ch.activ = true
+       AND ch.sens IN ('Cheltuiala', 'Incasare')
+       AND ch.neplatit = false
+       AND (ch.categorie_id IS NULL
+            OR (SELECT afecteaza_sold FROM categorii WHERE id = ch.categorie_id) IS NOT FALSE);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION tr_sold_moneda_alimentari()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_id, OLD.moneda, 'alimentari', -OLD.suma);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_id, NEW.moneda, 'alimentari', NEW.suma);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tr_sold_moneda_cheltuieli()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND sold_moneda_conteaza(OLD) THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_id, OLD.moneda, OLD.sens, -OLD.suma);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND sold_moneda_conteaza(NEW) THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_id, NEW.moneda, NEW.sens, NEW.suma);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transfers IN use moneda_dest/suma_dest when set (cross-currency)
+CREATE OR REPLACE FUNCTION tr_sold_moneda_transferuri()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_sursa_id, OLD.moneda, 'transfer_out', -OLD.suma);
+        PERFORM sold_moneda_delta(
+            OLD.exercitiu_id, OLD.portofel_dest_id,
+            COALESCE(OLD.moneda_dest, OLD.moneda), 'transfer_in',
+            -(CASE WHEN OLD.moneda_dest IS NOT NULL THEN OLD.suma_dest ELSE OLD.suma END)
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_sursa_id, NEW.moneda, 'transfer_out', NEW.suma);
+        PERFORM sold_moneda_delta(
+            NEW.exercitiu_id, NEW.portofel_dest_id,
+            COALESCE(NEW.moneda_dest, NEW.moneda), 'transfer_in',
+            CASE WHEN NEW.moneda_dest IS NOT NULL THEN NEW.suma_dest ELSE NEW.suma END
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- afecteaza_sold toggled: add or remove the categorie's cheltuieli/incasari
+CREATE OR REPLACE FUNCTION tr_sold_moneda_categorii()
+RETURNS TRIGGER AS $$
+DECLARE
+    semn INTEGER := CASE WHEN NEW.afecteaza_sold IS NOT FALSE THEN 1 ELSE -1 END;
+BEGIN
+    PERFORM sold_moneda_delta(x.exercitiu_id, x.portofel_id, x.moneda, x.sens, semn * x.suma)
+    FROM (
+        SELECT exercitiu_id, portofel_id, moneda, sens, SUM(suma) AS suma
+        FROM cheltuieli
+        WHERE categorie_id = NEW.id
+          AND activ = true
+          AND neplatit = false
+          AND sens IN ('Cheltuiala', 'Incasare')
+        GROUP BY exercitiu_id, portofel_id, moneda, sens
+    ) x;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tr_alimentari_sold_moneda ON alimentari;
+CREATE TRIGGER tr_alimentari_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON alimentari
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_alimentari();
+
+DROP TRIGGER IF EXISTS tr_cheltuieli_sold_moneda ON cheltuieli;
+CREATE TRIGGER tr_cheltuieli_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON cheltuieli
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_cheltuieli();
+
+DROP TRIGGER IF EXISTS tr_transferuri_sold_moneda ON transferuri;
+CREATE TRIGGER tr_transferuri_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON transferuri
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_transferuri();
+
+DROP TRIGGER IF EXISTS tr_categorii_sold_moneda ON categorii;
+CREATE TRIGGER tr_categorii_sold_moneda AFTER UPDATE OF afecteaza_sold ON categorii
+    FOR EACH ROW WHEN ((OLD.afecteaza_sold IS NOT FALSE) IS DISTINCT FROM (NEW.afecteaza_sold IS NOT FALSE))
+    EXECUTE FUNCTION tr_sold_moneda_categorii();
+
+COMMENT ON TABLE sold_portofel_moneda IS 'Totaluri zilnice per portofel/monedă/tip, întreținute incremental prin triggere';
+
+-- View: Solduri portofele (total + exercițiu activ), din sold_portofel_moneda
 CREATE OR REPLACE VIEW v_solduri_portofele AS
-SELECT 
+SELECT
     p.id as portofel_id,
     p.nume as portofel,
     p.ordine,
-    get_sold_portofel(p.id) as sold_total,
-    get_sold_portofel(p.id, (SELECT id FROM exercitii WHERE activ = true ORDER BY data DESC LIMIT 1)) as sold_zi_curenta
+    COALESCE((
+        SELECT SUM(CASE WHEN s.tip IN ('Cheltuiala', 'transfer_out') THEN -s.suma ELSE s.suma END)
+        FROM sold_portofel_moneda s
+        WHERE s.portofel_id = p.id
+    ), 0) as sold_total,
+    COALESCE((
+        SELECT SUM(CASE WHEN s.tip IN ('Cheltuiala', 'transfer_out') THEN -s.suma ELSE s.suma END)
+        FROM sold_portofel_moneda s
+        WHERE s.portofel_id = p.id
+          AND s.exercitiu_id = (SELECT id FROM exercitii WHERE activ = true ORDER BY data DESC LIMIT 1)
+    ), 0) as sold_zi_curenta
 FROM portofele p
 WHERE p.activ = true
 ORDER BY p.ordine;
@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { MessageCircle, Send, X, Minimize2, Maximize2, Bot, User } from 'lucide-react';
-import { useQuery, useMutation } from '@tanstack/react-query';
+import { useQuery } from '@tanstack/react-query';
 import { toast } from 'react-hot-toast';
 
 import { useAppStore } from '@/hooks/useAppStore';
@@ -36,24 +36,34 @@ export const AIChat: React.FC = () => {
 
   const isChatEnabled = settings?.find(s => s.cheie === 'ai_chat_enabled')?.valoare === 'true';
 
-  // Chat mutation
-  const chatMutation = useMutation({
-    mutationFn: (message: string) => api.chat(message),
-    onSuccess: (data) => {
-      const assistantMessage: ChatMessage = {
-        id: Date.now().toString(),
-        role: 'assistant',
-        content: data.response,
-        timestamp: new Date(),
-      };
-      setMessages(prev => [...prev, assistantMessage]);
-      setIsTyping(false);
-    },
-    onError: (err: any) => {
-      toast.error(err.response?.data?.detail || 'Eroare la comunicarea cu AI');
+  // Chat în flux: mesajul asistentului crește pe măsură ce sosesc token-urile
+  const [streamingId, setStreamingId] = useState<string | null>(null);
+
+  const sendChat = async (message: string) => {
+    const assistantId = (Date.now() + 1).toString();
+    let started = false;
+    try {
+      await api.chatStream(message, (token) => {
+        // Primul token ascunde indicatorul de tastare; nu re-setăm la fiecare token
+        if (!started) {
+          started = true;
+          setStreamingId(assistantId);
+        }
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last?.id === assistantId) {
+            return [...prev.slice(0, -1), { ...last, content: last.content + token }];
+          }
+          return [...prev, { id: assistantId, role: 'assistant', content: token, timestamp: new Date() }];
+        });
+      });
+    } catch (err: any) {
+      toast.error(err.message || 'Eroare la comunicarea cu AI');
+    } finally {
+      setStreamingId(null);
       setIsTyping(false);
-    },
-  });
+    }
+  };
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -84,7 +94,7 @@ export const AIChat: React.FC = () => {
     setInputValue('');
     setIsTyping(true);
 
-    chatMutation.mutate(message);
+    sendChat(message);
   };
 
   const handleKeyPress = (e: React.KeyboardEvent) => {
@@ -204,7 +214,7 @@ export const AIChat: React.FC = () => {
                   ))
                 )}
 
-                {isTyping && (
+                {isTyping && !streamingId && (
                   <div className="flex gap-3 justify-start">
                     <div className="flex-shrink-0 w-8 h-8 bg-gradient-to-r from-blue-600 to-purple-600 rounded-full flex items-center justify-center">
                       <Bot className="w-4 h-4 text-white" />
@@ -666,6 +666,38 @@ class ApiService {
     return data;
   }
 
+  // SSE peste POST (EventSource nu trimite body/Authorization): onToken primește fiecare bucată
+  async chatStream(message: string, onToken: (token: string) => void): Promise<void> {
+    const res = await fetch(`${API_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(this.token ? { Authorization: `Bearer ${this.token}` } : {}),
+      },
+      body: JSON.stringify({ message }),
+    });
+    if (!res.ok || !res.body) {
+      const err = await res.json().catch(() => null);
+      throw new Error(err?.detail || `HTTP ${res.status}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop() ?? '';
+      for (const event of events) {
+        if (!event.startsWith('data: ')) continue;
+        const msg = JSON.parse(event.slice(6));
+        if (msg.type === 'token') onToken(msg.content);
+      }
+    }
+  }
+
   // ============================================
   // GOOGLE REVIEWS
   // ============================================
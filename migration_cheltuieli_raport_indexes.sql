@@ -0,0 +1,21 @@
+-- Migration: partial indexes matching the report / sold filters on cheltuieli
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_cheltuieli_raport_indexes.sql
+--
+-- Every report query filters on activ = true AND sens = 'Cheltuiala'; the single-column
+-- idx_cheltuieli_activ / idx_cheltuieli_sens can't serve that together with exercitiu_id.
+-- Verify with:
+--   EXPLAIN ANALYZE SELECT * FROM cheltuieli
+--   WHERE exercitiu_id = ANY('{1,2}') AND activ = true AND sens = 'Cheltuiala'
+--   ORDER BY created_at DESC;
+
+-- Report items + totals (_fetch_raport_cheltuieli, _fetch_totaluri)
+CREATE INDEX IF NOT EXISTS idx_cheltuieli_raport
+    ON cheltuieli(exercitiu_id, categorie_id, moneda)
+    WHERE activ = true AND sens = 'Cheltuiala';
+
+-- Paid cheltuieli/incasari counted in portofel solduri (/portofele/solduri, backfills)
+CREATE INDEX IF NOT EXISTS idx_cheltuieli_sold
+    ON cheltuieli(exercitiu_id, portofel_id, moneda) INCLUDE (suma, categorie_id, sens)
+    WHERE activ = true AND neplatit = false AND sens IN ('Cheltuiala', 'Incasare');
+
+ANALYZE cheltuieli;
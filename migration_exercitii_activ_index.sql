@@ -0,0 +1,8 @@
+-- Migration: partial index for the active exercitiu lookup
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_exercitii_activ_index.sql
+--
+-- Serves SELECT ... FROM exercitii WHERE activ = true ORDER BY data DESC LIMIT 1
+-- straight from the index; replaces the plain idx_exercitii_activ(activ).
+
+CREATE INDEX IF NOT EXISTS idx_exercitii_activ_data ON exercitii(data DESC) WHERE activ = true;
+DROP INDEX IF EXISTS idx_exercitii_activ;
@@ -0,0 +1,27 @@
+-- Migration: composite indexes for the per-exercitiu listings
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_exercitiu_listing_indexes.sql
+--
+-- GET /cheltuieli, /alimentari and /transferuri all filter on exercitiu_id (plus
+-- activ = true for cheltuieli) and ORDER BY created_at DESC. With only the
+-- single-column indexes from init.sql Postgres fetches the whole day and sorts it;
+-- these serve filter + order straight from the index. The report aggregates use
+-- idx_cheltuieli_raport / sold_portofel_moneda (see their migrations).
+-- CONCURRENTLY: safe on a live database (must run outside a transaction block).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_cheltuieli_ex_activ_created
+    ON cheltuieli(exercitiu_id, created_at DESC)
+    WHERE activ = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alimentari_ex_created
+    ON alimentari(exercitiu_id, created_at DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transferuri_ex_created
+    ON transferuri(exercitiu_id, created_at DESC);
+
+-- Leading column of the composite indexes above
+DROP INDEX CONCURRENTLY IF EXISTS idx_alimentari_exercitiu;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transferuri_exercitiu;
+
+ANALYZE cheltuieli;
+ANALYZE alimentari;
+ANALYZE transferuri;
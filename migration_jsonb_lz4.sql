@@ -0,0 +1,17 @@
+-- Migration: LZ4 TOAST compression for the large JSONB payloads
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_jsonb_lz4.sql
+--
+-- apeluri_zilnic.hourly_data and the recomandari_apeluri blobs are always read
+-- whole (istoric / recomandari endpoints), never filtered with @> or jsonpath, so a
+-- GIN index would only cost writes. What they do pay on every read is TOAST
+-- decompression: LZ4 decompresses several times faster than the default pglz.
+-- SET COMPRESSION applies to newly written values (each night's apeluri_zilnic row,
+-- each new recomandari day); existing rows keep pglz until rewritten.
+
+ALTER TABLE apeluri_zilnic ALTER COLUMN hourly_data SET COMPRESSION lz4;
+
+ALTER TABLE recomandari_apeluri
+    ALTER COLUMN conversations SET COMPRESSION lz4,
+    ALTER COLUMN top_recomandari SET COMPRESSION lz4,
+    ALTER COLUMN top_lucruri_bune SET COMPRESSION lz4,
+    ALTER COLUMN tip_apeluri SET COMPRESSION lz4;
@@ -0,0 +1,16 @@
+-- Migration: HNSW index for the nomenclator embedding search (replaces ivfflat)
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_nomenclator_embedding_hnsw.sql
+--
+-- The ivfflat index was created in init.sql on an empty table, so its 50 lists were
+-- trained on no data and recall is poor. HNSW needs no training and can be built
+-- after the bulk load. Partial on the same filter as the autocomplete vector query
+-- (activ = true AND embedding IS NOT NULL); the query sets hnsw.ef_search per transaction.
+
+CREATE INDEX IF NOT EXISTS idx_nomenclator_embedding_hnsw
+    ON nomenclator USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE activ = true AND embedding IS NOT NULL;
+
+DROP INDEX IF EXISTS idx_nomenclator_embedding;
+
+ANALYZE nomenclator;
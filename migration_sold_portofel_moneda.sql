@@ -0,0 +1,211 @@
+-- Migration: sold_portofel_moneda (daily portofel totals per moneda and tip)
+-- Run: docker exec -i cheltuieli_db psql -U cheltuieli_user -d cheltuieli < migration_sold_portofel_moneda.sql
+--
+-- Pre-aggregated version of the five per-portofel sums behind the daily report
+-- (alimentari, Cheltuiala, Incasare, transfer_in, transfer_out), per exercitiu and
+-- moneda. It is kept exact by triggers instead of being a materialized view, so the
+-- report never reads a stale sold between refreshes.
+--
+-- This is the single source of truth for solduri: v_solduri_portofele is rebuilt on
+-- top of it below, and the older solduri_portofel table (with its triggers) is
+-- dropped if a previous migration created it. docker/init.sql creates the same
+-- objects on a fresh database, so this file is only needed for existing ones.
+--
+-- Runs in one transaction with the source tables locked against writes: a row
+-- written between CREATE TRIGGER and the backfill would otherwise be counted twice
+-- or lost to the TRUNCATE. Reads continue; writes wait until COMMIT.
+
+BEGIN;
+
+LOCK TABLE alimentari, cheltuieli, transferuri, categorii IN SHARE MODE;
+
+CREATE TABLE IF NOT EXISTS sold_portofel_moneda (
+    exercitiu_id INTEGER NOT NULL REFERENCES exercitii(id) ON DELETE CASCADE,
+    portofel_id  INTEGER NOT NULL REFERENCES portofele(id) ON DELETE CASCADE,
+    moneda       VARCHAR(3) NOT NULL,
+    tip          VARCHAR(20) NOT NULL,  -- alimentari, Cheltuiala, Incasare, transfer_in, transfer_out
+    suma         NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (exercitiu_id, portofel_id, moneda, tip)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sold_portofel_moneda_portofel ON sold_portofel_moneda(portofel_id);
+
+CREATE OR REPLACE FUNCTION sold_moneda_delta(
+    p_exercitiu_id INTEGER,
+    p_portofel_id INTEGER,
+    p_moneda VARCHAR,
+    p_tip VARCHAR,
+    p_delta NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_exercitiu_id IS NULL OR p_portofel_id IS NULL OR COALESCE(p_delta, 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO sold_portofel_moneda (exercitiu_id, portofel_id, moneda, tip, suma)
+    SELECT p_exercitiu_id, p_portofel_id, COALESCE(p_moneda, 'RON'), p_tip, p_delta
+    WHERE EXISTS (SELECT 1 FROM exercitii WHERE id = p_exercitiu_id)
+    ON CONFLICT (exercitiu_id, portofel_id, moneda, tip) DO UPDATE
+        SET suma = sold_portofel_moneda.suma + EXCLUDED.suma;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Paid, active, and the categorie (if any) doesn't have afecteaza_sold = false; a NULL
+-- flag or a deleted categorie counts, like get_sold_portofel
+CREATE OR REPLACE FUNCTION sold_moneda_conteaza(ch cheltuieli)
+RETURNS BOOLEAN AS $$
+    SELECT ch.activ = true
+       AND ch.sens IN ('Cheltuiala', 'Incasare')
+       AND ch.neplatit = false
+       AND (ch.categorie_id IS NULL
+            OR (SELECT afecteaza_sold FROM categorii WHERE id = ch.categorie_id) IS NOT FALSE);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION tr_sold_moneda_alimentari()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_id, OLD.moneda, 'alimentari', -OLD.suma);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_id, NEW.moneda, 'alimentari', NEW.suma);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tr_sold_moneda_cheltuieli()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND sold_moneda_conteaza(OLD) THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_id, OLD.moneda, OLD.sens, -OLD.suma);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND sold_moneda_conteaza(NEW) THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_id, NEW.moneda, NEW.sens, NEW.suma);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transfers IN use moneda_dest/suma_dest when set (cross-currency)
+CREATE OR REPLACE FUNCTION tr_sold_moneda_transferuri()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM sold_moneda_delta(OLD.exercitiu_id, OLD.portofel_sursa_id, OLD.moneda, 'transfer_out', -OLD.suma);
+        PERFORM sold_moneda_delta(
+            OLD.exercitiu_id, OLD.portofel_dest_id,
+            COALESCE(OLD.moneda_dest, OLD.moneda), 'transfer_in',
+            -(CASE WHEN OLD.moneda_dest IS NOT NULL THEN OLD.suma_dest ELSE OLD.suma END)
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM sold_moneda_delta(NEW.exercitiu_id, NEW.portofel_sursa_id, NEW.moneda, 'transfer_out', NEW.suma);
+        PERFORM sold_moneda_delta(
+            NEW.exercitiu_id, NEW.portofel_dest_id,
+            COALESCE(NEW.moneda_dest, NEW.moneda), 'transfer_in',
+            CASE WHEN NEW.moneda_dest IS NOT NULL THEN NEW.suma_dest ELSE NEW.suma END
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- afecteaza_sold toggled: add or remove the categorie's cheltuieli/incasari
+CREATE OR REPLACE FUNCTION tr_sold_moneda_categorii()
+RETURNS TRIGGER AS $$
+DECLARE
+    semn INTEGER := CASE WHEN NEW.afecteaza_sold IS NOT FALSE THEN 1 ELSE -1 END;
+BEGIN
+    PERFORM sold_moneda_delta(x.exercitiu_id, x.portofel_id, x.moneda, x.sens, semn * x.suma)
+    FROM (
+        SELECT exercitiu_id, portofel_id, moneda, sens, SUM(suma) AS suma
+        FROM cheltuieli
+        WHERE categorie_id = NEW.id
+          AND activ = true
+          AND neplatit = false
+          AND sens IN ('Cheltuiala', 'Incasare')
+        GROUP BY exercitiu_id, portofel_id, moneda, sens
+    ) x;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tr_alimentari_sold_moneda ON alimentari;
+CREATE TRIGGER tr_alimentari_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON alimentari
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_alimentari();
+
+DROP TRIGGER IF EXISTS tr_cheltuieli_sold_moneda ON cheltuieli;
+CREATE TRIGGER tr_cheltuieli_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON cheltuieli
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_cheltuieli();
+
+DROP TRIGGER IF EXISTS tr_transferuri_sold_moneda ON transferuri;
+CREATE TRIGGER tr_transferuri_sold_moneda AFTER INSERT OR UPDATE OR DELETE ON transferuri
+    FOR EACH ROW EXECUTE FUNCTION tr_sold_moneda_transferuri();
+
+DROP TRIGGER IF EXISTS tr_categorii_sold_moneda ON categorii;
+CREATE TRIGGER tr_categorii_sold_moneda AFTER UPDATE OF afecteaza_sold ON categorii
+    FOR EACH ROW WHEN ((OLD.afecteaza_sold IS NOT FALSE) IS DISTINCT FROM (NEW.afecteaza_sold IS NOT FALSE))
+    EXECUTE FUNCTION tr_sold_moneda_categorii();
+
+-- Backfill from existing data (safe to re-run)
+TRUNCATE sold_portofel_moneda;
+
+INSERT INTO sold_portofel_moneda (exercitiu_id, portofel_id, moneda, tip, suma)
+SELECT exercitiu_id, portofel_id, moneda, tip, SUM(suma)
+FROM (
+    SELECT exercitiu_id, portofel_id, COALESCE(moneda, 'RON') AS moneda, 'alimentari' AS tip, suma
+    FROM alimentari
+    UNION ALL
+    SELECT ch.exercitiu_id, ch.portofel_id, COALESCE(ch.moneda, 'RON'), ch.sens, ch.suma
+    FROM cheltuieli ch
+    WHERE sold_moneda_conteaza(ch)
+    UNION ALL
+    SELECT exercitiu_id, portofel_dest_id, COALESCE(moneda_dest, moneda, 'RON'), 'transfer_in',
+           CASE WHEN moneda_dest IS NOT NULL THEN suma_dest ELSE suma END
+    FROM transferuri
+    UNION ALL
+    SELECT exercitiu_id, portofel_sursa_id, COALESCE(moneda, 'RON'), 'transfer_out', suma
+    FROM transferuri
+) x
+WHERE exercitiu_id IS NOT NULL AND portofel_id IS NOT NULL AND suma IS NOT NULL
+GROUP BY exercitiu_id, portofel_id, moneda, tip;
+
+COMMENT ON TABLE sold_portofel_moneda IS 'Totaluri zilnice per portofel/monedă/tip, întreținute incremental prin triggere';
+
+-- Solduri view: signed sum over the same table (all history + exercitiul activ)
+CREATE OR REPLACE VIEW v_solduri_portofele AS
+SELECT
+    p.id as portofel_id,
+    p.nume as portofel,
+    p.ordine,
+    COALESCE((
+        SELECT SUM(CASE WHEN s.tip IN ('Cheltuiala', 'transfer_out') THEN -s.suma ELSE s.suma END)
+        FROM sold_portofel_moneda s
+        WHERE s.portofel_id = p.id
+    ), 0) as sold_total,
+    COALESCE((
+        SELECT SUM(CASE WHEN s.tip IN ('Cheltuiala', 'transfer_out') THEN -s.suma ELSE s.suma END)
+        FROM sold_portofel_moneda s
+        WHERE s.portofel_id = p.id
+          AND s.exercitiu_id = (SELECT id FROM exercitii WHERE activ = true ORDER BY data DESC LIMIT 1)
+    ), 0) as sold_zi_curenta
+FROM portofele p
+WHERE p.activ = true
+ORDER BY p.ordine;
+
+-- Remove the superseded solduri_portofel table and its triggers (no-op on new databases)
+DROP TRIGGER IF EXISTS tr_alimentari_solduri ON alimentari;
+DROP TRIGGER IF EXISTS tr_cheltuieli_solduri ON cheltuieli;
+DROP TRIGGER IF EXISTS tr_transferuri_solduri ON transferuri;
+DROP TRIGGER IF EXISTS tr_categorii_solduri ON categorii;
+DROP FUNCTION IF EXISTS tr_solduri_alimentari();
+DROP FUNCTION IF EXISTS tr_solduri_cheltuieli();
+DROP FUNCTION IF EXISTS tr_solduri_transferuri();
+DROP FUNCTION IF EXISTS tr_solduri_categorii();
+DROP FUNCTION IF EXISTS sold_contributie_cheltuiala(cheltuieli);
+DROP FUNCTION IF EXISTS sold_portofel_delta(INTEGER, INTEGER, NUMERIC);
+DROP TABLE IF EXISTS solduri_portofel;
+
+COMMIT;